@@ -0,0 +1,214 @@
+import pygame
+import os
+import mmap
+import struct
+import time
+import threading
+import numpy as np
+
+
+# The resources folder next to this module, so that the game can be started from any working directory,
+# and the folder holding the data cached between launches.
+resources_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+
+# A surface is locked while its pixels are read and a locked surface cannot be drawn. Since missions are prepared
+# on a worker thread while the game loop draws, the pixels of shared surfaces are only read while holding this lock,
+# which the game loop holds while drawing.
+surface_lock = threading.RLock()
+
+
+# The header of the scaled images in the cache folder: a magic number, the width and height and whether all the
+# pixels are opaque, padded to 16 bytes so that the mapped pixels stay aligned for blitting.
+scaled_header_format = "<4sHHB7x"
+scaled_header_size = struct.calcsize(scaled_header_format)
+scaled_magic = b"MLSC"
+
+
+# Writes the given bytes to the given file, creating its folder if needed. The bytes go to a temporary file next to
+# it which is then renamed over it, so that the file is replaced atomically and a crash mid-write leaves the previous
+# version intact. With durable the temporary file is also flushed to the disk before the rename.
+def write_atomically(path, data, durable=False):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + ".tmp", "wb") as temporary:
+        temporary.write(data)
+        if durable:
+            temporary.flush()
+            os.fsync(temporary.fileno())
+    os.replace(path + ".tmp", path)
+
+
+# This class loads every image resource from disk only once per process and hands out shared references to it,
+# along with the collision mask built from it. Images are converted to the pixel format of the display as soon as
+# a display mode has been set, which keeps blitting them cheap. Load counts and timings are kept for every asset.
+class AssetRegistry:
+    def __init__(self):
+        self.images = {}
+        self.masks = {}
+        self.atlases = {}
+
+        # Scaled copies of images, keyed on (size, *path), and whether all the pixels of each are opaque.
+        self.scaled_images = {}
+        self.scaled_opaque = {}
+
+        # Image surfaces (keyed on their path) and scaled copies (keyed on their size and path) which were loaded
+        # before a display mode was set and still await conversion.
+        self.unconverted = set()
+
+        # Per-asset statistics: how many times it was requested, how many times it was read from disk
+        # and the total time spent on reading, converting and building its mask (in seconds).
+        self.request_counts = {}
+        self.load_counts = {}
+        self.load_times = {}
+
+    # Returns the shared image surface stored at the given path below the resources folder.
+    def image(self, *path):
+        with surface_lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+            if path not in self.images:
+                start = time.perf_counter()
+                self.images[path] = pygame.image.load(os.path.join(resources_path, *path))
+                self.unconverted.add(path)
+                self.load_counts[path] = self.load_counts.get(path, 0) + 1
+                self.load_times[path] = self.load_times.get(path, 0) + time.perf_counter() - start
+
+            # Convert the image to the display pixel format once a display is available.
+            if path in self.unconverted and pygame.display.get_surface() is not None:
+                start = time.perf_counter()
+                self.images[path] = self.images[path].convert_alpha()
+                self.unconverted.discard(path)
+                self.load_times[path] += time.perf_counter() - start
+            return self.images[path]
+
+    # Returns the shared collision mask of the image stored at the given path below the resources folder.
+    def mask(self, *path):
+        with surface_lock:
+            if path not in self.masks:
+                image = self.images[path] if path in self.images else self.image(*path)
+                start = time.perf_counter()
+                self.masks[path] = pygame.mask.from_surface(image)
+                self.load_times[path] += time.perf_counter() - start
+            return self.masks[path]
+
+    # Returns the shared rotation atlas of the image stored at the given path below the resources folder.
+    def rotations(self, *path):
+        with surface_lock:
+            if path not in self.atlases:
+                self.atlases[path] = RotationAtlas(self.image(*path), self.mask(*path))
+            return self.atlases[path]
+
+    # Returns the shared copy of the image stored at the given path below the resources folder, smoothly scaled
+    # to the given size. Each scaled copy is also written to the cache folder as raw pixels, which later launches
+    # map into memory instead of decoding and scaling the image again. Like the images, the copies are brought
+    # to the pixel format of the display once a display mode has been set.
+    def scaled(self, size, *path):
+        key = (tuple(size),) + path
+        with surface_lock:
+            if key not in self.scaled_images:
+                start = time.perf_counter()
+                cache_file = os.path.join(cache_path, "scaled", "%s_%dx%d.bgra" % ("_".join(path), size[0], size[1]))
+                loaded = self.load_scaled(cache_file, size, os.path.join(resources_path, *path))
+                if loaded is None:
+                    surface = pygame.transform.smoothscale(self.image(*path), size)
+                    opaque = bool(not surface.get_flags() & pygame.SRCALPHA or
+                                  pygame.surfarray.pixels_alpha(surface).min() == 255)
+                    self.save_scaled(cache_file, surface, opaque)
+                else:
+                    surface, opaque = loaded
+                self.scaled_images[key] = surface
+                self.scaled_opaque[key] = opaque
+                self.unconverted.add(key)
+                self.load_times[path] = self.load_times.get(path, 0) + time.perf_counter() - start
+            if key in self.unconverted and pygame.display.get_surface() is not None:
+                start = time.perf_counter()
+                self.scaled_images[key] = self.display_format(self.scaled_images[key], self.scaled_opaque[key])
+                self.unconverted.discard(key)
+                self.load_times[path] += time.perf_counter() - start
+            return self.scaled_images[key]
+
+    # Returns the given 32 bit surface in the pixel format of the display, without an alpha channel if all its pixels
+    # are opaque since opaque surfaces are much faster to blit. When the display has the same color layout, as 32 bit
+    # displays usually do, the surface itself is returned, so that a mapped cache file is never copied.
+    def display_format(self, surface, opaque):
+        display = pygame.display.get_surface()
+        if surface.get_bitsize() == display.get_bitsize() == 32 and surface.get_masks()[:3] == display.get_masks()[:3]:
+            if opaque:
+                surface.set_alpha(None)
+            return surface
+        if opaque:
+            return surface.convert()
+        return surface.convert_alpha()
+
+    # Maps a scaled image written by save_scaled() into memory and returns it along with whether all its pixels are
+    # opaque. Returns None if there is no such file, if it is older than the source image or if it does not hold an
+    # image of the given size.
+    def load_scaled(self, cache_file, size, source):
+        if not os.path.isfile(cache_file) or os.path.getmtime(cache_file) < os.path.getmtime(source):
+            return None
+        if os.path.getsize(cache_file) != scaled_header_size + size[0] * size[1] * 4:
+            return None
+
+        # The mapping is copy on write, so the surface can be drawn upon without ever changing the file.
+        with open(cache_file, "rb") as pixels:
+            mapping = mmap.mmap(pixels.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, width, height, opaque = struct.unpack_from(scaled_header_format, mapping)
+        if magic != scaled_magic or (width, height) != tuple(size):
+            return None
+        return pygame.image.frombuffer(memoryview(mapping)[scaled_header_size:], size, "BGRA"), bool(opaque)
+
+    # Writes the pixels of a scaled image to the given file, in the byte order of 32 bit display surfaces, after a
+    # header holding its size and whether all its pixels are opaque. The file is replaced atomically, and left out if
+    # the cache folder is not writable.
+    def save_scaled(self, cache_file, surface, opaque):
+        header = struct.pack(scaled_header_format, scaled_magic, surface.get_width(), surface.get_height(), opaque)
+        try:
+            write_atomically(cache_file, header + pygame.image.tobytes(surface, "BGRA"))
+        except OSError:
+            pass
+
+    # Returns one line of text per loaded asset with its request count, disk load count and load time.
+    def report(self):
+        lines = []
+        for path in sorted(self.load_counts):
+            lines.append("{0:45s} requested {1:6d}  loaded {2:3d}  {3:8.2f} ms".format(
+                "/".join(path), self.request_counts[path], self.load_counts[path], self.load_times[path] * 1000))
+        return lines
+
+    # Prints the lines of report().
+    def print_report(self):
+        print("\n".join(self.report()))
+
+
+# This class holds the rotated versions of an image for every integer angle between -90 and 90 degrees, so that turning
+# a sprite is a table lookup instead of a transformation. Each entry consists of the rotated surface, its collision
+# mask and the offset of its rect's top left corner with respect to the rotation centre. Entries are built lazily
+# on first use, as are the bottom profiles of the rotated images.
+class RotationAtlas:
+    def __init__(self, image, mask):
+        self.entries = {0: (image, mask, (-(image.get_width() // 2), -(image.get_height() // 2)))}
+        self.image = image
+        self.profiles = {}
+
+    # Returns the (surface, mask, offset) entry for the given angle.
+    def get(self, angle):
+        if angle not in self.entries:
+            with surface_lock:
+                rotated = pygame.transform.rotate(self.image, angle)
+                self.entries[angle] = (rotated, pygame.mask.from_surface(rotated),
+                                       (-(rotated.get_width() // 2), -(rotated.get_height() // 2)))
+        return self.entries[angle]
+
+    # Returns the bottom profile of the image rotated by the given angle: for every column of its rect the bottom of
+    # its lowest set mask pixel, measured from the top of the rect, and 0 for the columns without any.
+    def profile(self, angle):
+        if angle not in self.profiles:
+            solid = pygame.surfarray.array_red(self.get(angle)[1].to_surface()) > 0
+            self.profiles[angle] = np.where(solid.any(axis=1), solid.shape[1] - solid[:, ::-1].argmax(axis=1), 0)
+        return self.profiles[angle]
+
+
+# The registry shared by the whole game.
+asset_registry = AssetRegistry()
@@ -0,0 +1,273 @@
+import pygame
+import numpy as np
+from assets import asset_registry
+from terrain import get_terrain
+
+
+# Returns the opaque bounding boxes of the given sprites as an array with one (left, top, right, bottom) row each.
+def opaque_boxes(sprites):
+    boxes = []
+    for sprite in sprites:
+        bounds = sprite.mask.get_bounding_rects()
+        box = bounds[0].unionall(bounds[1:]) if bounds else pygame.Rect(0, 0, 0, 0)
+        box.move_ip(sprite.rect.topleft)
+        boxes.append((box.left, box.top, box.right, box.bottom))
+    return np.array(boxes, dtype=np.int64).reshape(-1, 4)
+
+
+# This class advances a whole population of landers at once. Every lander attribute is kept in its own NumPy array
+# (struct-of-arrays) and each tick is a handful of vectorised operations, which lets controller evaluation jobs run
+# millions of lander-steps per second. The physics mirror Lander.turn/accelerate/update and Mission.is_soft_landing,
+# including the rounding of the rect coordinates and the wrap around the screen sides. Collisions with landing pads
+# and obstacles are tested against the opaque bounding boxes of their images instead of pixel masks, all along the
+# landers' paths during the tick when swept collisions are on, and the terrain against the bottom profiles of the
+# lander images like Simulation.check_terrain, while random control failures and meteor storms are not simulated.
+class LanderBatch:
+    def __init__(self, settings, count, landing_sprites, hazards=(), seed=None):
+        self.count = count
+        self.screen_width = settings.screen_width
+        self.screen_height = settings.screen_height
+        self.swept_collisions = settings.swept_collisions
+        self.simulation_hz = settings.simulation_hz
+        self.rng = np.random.default_rng(seed)
+
+        # The changes of velocity, heading and fuel over a tick, like those of Lander.
+        self.gravity = settings.gravity / settings.simulation_hz
+        self.turn_step = settings.turn_rate / settings.simulation_hz
+        self.fuel_burn = settings.fuel_burn / settings.simulation_hz
+
+        # Precompute the lander's rect size for every angle between -90 and 90 degrees.
+        rotations = asset_registry.rotations("lander.png")
+        sizes = [rotations.get(angle)[0].get_size() for angle in range(-90, 91)]
+        self.widths = np.array([size[0] for size in sizes], dtype=np.int64)
+        self.heights = np.array([size[1] for size in sizes], dtype=np.int64)
+
+        # Precompute the thrust components for every angle.
+        radians = np.radians(np.arange(-90, 91))
+        self.thrust_x = settings.thrust / settings.simulation_hz * np.sin(-radians)
+        self.thrust_y = settings.thrust / settings.simulation_hz * np.cos(radians)
+
+        # Opaque bounding boxes (left, top, right, bottom) of the landing pads and the damage-causing hazards,
+        # as well as the full rects of the landing pads.
+        self.pads = opaque_boxes(landing_sprites)
+        self.pad_rects = np.array([sprite.rect for sprite in landing_sprites], dtype=np.int64).reshape(-1, 4)
+        self.pad_rects[:, 2:] += self.pad_rects[:, :2]
+        self.obstacles = opaque_boxes(hazards)
+        self.obstacle_damage = np.array([hazard.damage_caused for hazard in hazards], dtype=np.int64)
+
+        # The lowest top the lander can have above the terrain, cleared under the landing pads, at every angle,
+        # indexed on the angle and on the left column of the lander's rect plus the widest rect's width (see
+        # Terrain.top_limits). None without terrain collisions.
+        self.terrain_limits = None
+        if settings.terrain_collision:
+            terrain = get_terrain(settings).cleared([sprite.rect for sprite in landing_sprites])
+            self.terrain_margin = int(self.widths.max())
+            self.terrain_limits = np.stack([terrain.top_limits(rotations.profile(angle), self.terrain_margin)
+                                            for angle in range(-90, 91)]).astype(np.int64)
+
+        self.reset()
+
+    # Places all the landers at the top of the screen with fresh random velocities, full fuel and no damage.
+    def reset(self):
+        count = self.count
+        start = pygame.Rect(0, 0, self.widths[90], self.heights[90])
+        start.center = (self.screen_width / 2, start.height / 2)
+        self.x = np.full(count, start.x, dtype=np.int64)
+        self.y = np.full(count, start.y, dtype=np.int64)
+        self.velocity_x = self.rng.uniform(-60, 60, count)
+        self.velocity_y = self.rng.random(count) * 60
+        self.heading = np.zeros(count)
+        self.angle = np.zeros(count, dtype=np.int64)
+        self.fuel = np.full(count, 1000.0)
+        self.damage = np.zeros(count, dtype=np.int64)
+        self.has_landed = np.zeros(count, dtype=bool)
+        self.has_crashed = np.zeros(count, dtype=bool)
+        self.is_touching = np.zeros((count, len(self.obstacles)), dtype=bool)
+        self.moved_x = np.zeros(count, dtype=np.int64)
+        self.moved_y = np.zeros(count, dtype=np.int64)
+        self.ticks = 0
+        self.ticks_to_end = np.zeros(count, dtype=np.int64)
+
+    # Returns a boolean array marking the landers which have neither landed nor crashed yet.
+    def is_flying(self):
+        return ~(self.has_landed | self.has_crashed)
+
+    # Advances every flying lander by a single tick. turn holds -1 (right), 0 or 1 (left) and thrust holds booleans,
+    # one entry per lander. Landers whose damage has reached 100% ignore their controls.
+    def step(self, turn, thrust):
+        flying = self.is_flying()
+        functional = flying & (self.damage < 100)
+
+        # Turn, keeping the rect centred at the same point just like Lander.turn.
+        turning = functional & (turn != 0)
+        index = self.angle + 90
+        center_x = self.x + self.widths[index] // 2
+        center_y = self.y + self.heights[index] // 2
+        self.heading = np.where(turning, np.clip(self.heading + turn * self.turn_step, -90, 90), self.heading)
+        self.angle = np.rint(self.heading).astype(np.int64)
+        index = self.angle + 90
+        self.x = np.where(turning, center_x - self.widths[index] // 2, self.x)
+        self.y = np.where(turning, center_y - self.heights[index] // 2, self.y)
+        width = self.widths[index]
+        height = self.heights[index]
+        start_x = self.x.copy()
+        start_y = self.y.copy()
+
+        # Fire the thrusters of the landers with enough fuel left.
+        firing = functional & thrust & (self.fuel >= self.fuel_burn)
+        self.velocity_x = np.where(firing, self.velocity_x + self.thrust_x[index], self.velocity_x)
+        self.velocity_y = np.where(firing, self.velocity_y - self.thrust_y[index], self.velocity_y)
+        self.fuel -= np.where(firing, self.fuel_burn, 0)
+
+        # Apply gravity and move, rounding the distances covered in the tick like Lander.move does.
+        self.velocity_y = np.where(flying, self.velocity_y + self.gravity, self.velocity_y)
+        self.y += np.where(flying, np.rint(self.velocity_y / self.simulation_hz).astype(np.int64), 0)
+        self.x += np.where(flying, np.rint(self.velocity_x / self.simulation_hz).astype(np.int64), 0)
+
+        # Crash the landers at the bottom of the screen and prevent them from flying off the top.
+        grounded = flying & (self.y + height > self.screen_height)
+        self.y = np.where(grounded, self.screen_height - height, self.y)
+        self.y = np.where(flying & (self.y < 0), 0, self.y)
+        self.damage[grounded] = 100
+        self.has_crashed |= grounded
+
+        # Wrap around the right and left side.
+        center_x = self.x + width // 2
+        self.x = np.where(flying & (center_x > self.screen_width), -(width // 2), self.x)
+        self.x = np.where(flying & (center_x < 0), self.screen_width - width // 2, self.x)
+
+        # Note how far every lander moved for the swept collision tests, like Simulation.step. Landers which wrapped
+        # around a side or did not move are only tested where they ended the tick.
+        self.moved_x = self.x - start_x
+        self.moved_y = self.y - start_y
+        unswept = (not self.swept_collisions) | (np.abs(self.moved_x) >= self.screen_width / 2)
+        self.moved_x[unswept] = 0
+        self.moved_y[unswept] = 0
+
+        # The area every lander covered during the tick: its rect, stretched back to where it started the tick. A
+        # lander can only have touched the boxes this area overlaps, which keeps the exact tests to those landers.
+        self.left = np.minimum(self.x, self.x - self.moved_x)
+        self.top = np.minimum(self.y, self.y - self.moved_y)
+        self.right = np.maximum(self.x, self.x - self.moved_x) + width
+        self.bottom = np.maximum(self.y, self.y - self.moved_y) + height
+
+        self.check_hits(flying, width, height)
+        self.check_landing(flying, width, height)
+        self.check_terrain(flying, index)
+
+        self.ticks += 1
+        self.ticks_to_end[flying & ~self.is_flying()] = self.ticks
+
+    # Damages the landers upon the first tick at which they overlap an obstacle.
+    def check_hits(self, flying, width, height):
+        if not len(self.obstacles):
+            return
+        overlap = np.zeros(self.is_touching.shape, dtype=bool)
+        rows = self.near(self.obstacles, flying)
+        if len(rows):
+            overlap[rows] = self.impact_times(self.obstacles, width, height, rows) <= 1
+        new_hits = overlap & ~self.is_touching
+        self.damage = np.minimum(self.damage + new_hits.astype(np.int64) @ self.obstacle_damage, 100)
+        self.is_touching = np.where(flying[:, None], overlap, self.is_touching)
+
+    # Lands or crashes the landers touching a landing pad, following the rules of Mission.is_soft_landing.
+    def check_landing(self, flying, width, height):
+        if not len(self.pads):
+            return
+        rows = self.near(self.pads, flying)
+        if not len(rows):
+            return
+
+        # The landers swept into a landing pad touched the one they reached first. Like Simulation.check_landing
+        # a landing pad overlapped at the end of the tick counts as touched at fraction 1.
+        overlap = self.overlaps(self.pads, width, height, rows)
+        times = np.where(overlap, 1.0, self.impact_times(self.pads, width, height, rows))
+        first = times.argmin(axis=1)
+        fraction = times[np.arange(len(rows)), first]
+        touched = fraction <= 1
+        rows = rows[touched]
+        first = first[touched]
+        fraction = fraction[touched]
+
+        # Landers which would have passed the landing pad by the end of the tick are put back where they touched it.
+        back = 1 - fraction
+        self.x[rows] -= np.rint(self.moved_x[rows] * back).astype(np.int64)
+        self.y[rows] -= np.rint(self.moved_y[rows] * back).astype(np.int64)
+
+        # The first touched landing pad decides the outcome, both bottom corners of the lander have to rest within
+        # its rect for a soft landing.
+        pad = self.pad_rects[first]
+        left = self.x[rows]
+        right = left + width[rows]
+        bottom = self.y[rows] + height[rows]
+        on_pad = ((pad[:, 0] <= left) & (left < pad[:, 2]) & (pad[:, 0] <= right) & (right < pad[:, 2]) &
+                  (pad[:, 1] <= bottom) & (bottom < pad[:, 3]))
+        velocity_x = self.velocity_x[rows]
+        velocity_y = self.velocity_y[rows]
+        angle = self.angle[rows]
+        soft = ((0 < velocity_y) & (velocity_y < 300) & (-300 < velocity_x) & (velocity_x < 300) &
+                (-3 < angle) & (angle < 3) & on_pad)
+        self.has_landed[rows[soft]] = True
+        crashed = rows[~soft]
+        self.damage[crashed] = 100
+        self.has_crashed[crashed] = True
+
+    # Crashes the landers which have sunk into the terrain, unless they have just landed or crashed on a landing pad.
+    def check_terrain(self, flying, index):
+        if self.terrain_limits is None:
+            return
+        left = np.clip(self.x, -self.terrain_margin, self.screen_width) + self.terrain_margin
+        limit = self.terrain_limits[index, left]
+        sunk = flying & self.is_flying() & (self.y > limit)
+        self.y = np.where(sunk, limit, self.y)
+        self.damage[sunk] = 100
+        self.has_crashed |= sunk
+
+    # Returns the indices of the flying landers whose area covered during the last tick overlaps any of the given
+    # boxes. The others cannot have touched one, so only these go through the exact tests.
+    def near(self, boxes, flying):
+        left = self.left[:, None]
+        top = self.top[:, None]
+        right = self.right[:, None]
+        bottom = self.bottom[:, None]
+        near = ((left < boxes[:, 2]) & (boxes[:, 0] < right) & (top < boxes[:, 3]) & (boxes[:, 1] < bottom)).any(axis=1)
+        return np.flatnonzero(near & flying)
+
+    # Returns an (R, K) array of the earliest fraction of the last tick at which the rect of each of the R landers of
+    # the given indices overlapped each of the K given boxes, having moved by (moved_x, moved_y) to its current
+    # position, and infinity where it never did. This is the slab method of spatial.time_of_impact applied to the
+    # boxes alone.
+    def impact_times(self, boxes, width, height, rows):
+        entry = np.zeros((len(rows), len(boxes)))
+        exit = np.ones((len(rows), len(boxes)))
+        for low, size, moved, box_low, box_high in ((self.x, width, self.moved_x, boxes[:, 0], boxes[:, 2]),
+                                                    (self.y, height, self.moved_y, boxes[:, 1], boxes[:, 3])):
+            start_low = (low[rows] - moved[rows])[:, None]
+            start_high = start_low + size[rows][:, None]
+            moved = moved[rows][:, None]
+            still = moved == 0
+            divisor = np.where(still, 1, moved)
+            first = (box_low - start_high) / divisor
+            last = (box_high - start_low) / divisor
+            entry = np.where(still, entry, np.maximum(entry, np.minimum(first, last)))
+            exit = np.where(still, exit, np.minimum(exit, np.maximum(first, last)))
+            exit[still & ((start_low >= box_high) | (box_low >= start_high))] = -np.inf
+        return np.where(entry < exit, entry, np.inf)
+
+    # Returns an (R, K) boolean array telling which rects of the R landers of the given indices overlap which of the K
+    # given boxes.
+    def overlaps(self, boxes, width, height, rows):
+        left = self.x[rows][:, None]
+        top = self.y[rows][:, None]
+        right = left + width[rows][:, None]
+        bottom = top + height[rows][:, None]
+        return ((left < boxes[:, 2]) & (boxes[:, 0] < right) &
+                (top < boxes[:, 3]) & (boxes[:, 1] < bottom))
+
+    # Steps the batch until every lander has landed or crashed, or max_ticks have passed. The pilot is a function
+    # which receives the batch before each tick and returns the turn and thrust arrays.
+    def run(self, pilot, max_ticks=100000):
+        while self.is_flying().any() and self.ticks < max_ticks:
+            turn, thrust = pilot(self)
+            self.step(turn, thrust)
+        return self.has_landed
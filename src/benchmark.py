@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import random
+import argparse
+import subprocess
+import statistics
+import time
+
+# Run without a window.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from settings import Settings
+from simulation import Simulation
+from mission import Mission
+from instruments import Instruments
+from screens import MenuScreen, GamePlayScreen
+
+
+# Returns the median time (in milliseconds) of the given function over the given number of calls.
+def median_time(function, repeat):
+    times = []
+    for x in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+# Measures the time per frame of GamePlayScreen.play plus draw, with the thruster and steering keys pressed
+# in a fixed pattern. A new mission is started whenever one ends instead of waiting for a key press.
+def bench_frames(settings, screen, frames):
+    game = GamePlayScreen(settings, 5, 0, 3)
+    keys = [pygame.K_SPACE, pygame.K_LEFT, pygame.K_SPACE, pygame.K_RIGHT]
+    start = time.perf_counter()
+    for frame in range(frames):
+        if game.mission.lander.has_crashed or game.mission.lander.has_landed:
+            game.start_mission(settings)
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=keys[frame % len(keys)]))
+        game.play(settings)
+        dirty_areas = game.draw(screen, settings)
+        if dirty_areas is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty_areas)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+# Measures the time of a single Mission.check_hits call with the given number of hazards spread over the screen
+# and the lander at a random position among them.
+def bench_check_hits(settings, hazard_count, calls):
+    rng = random.Random(hazard_count)
+    simulation = Simulation(settings, 1, hazard_count)
+    simulation.create_meteor_storm(settings, max(1, hazard_count - len(simulation.obstacles)))
+    field = simulation.meteor_field
+    for index in range(field.count):
+        rect = field.rect(index)
+        rect.center = (rng.randrange(settings.screen_width), rng.randrange(settings.screen_height))
+        field.x[index], field.y[index] = rect.topleft
+    positions = [(rng.randrange(settings.screen_width), rng.randrange(settings.screen_height)) for x in range(calls)]
+    start = time.perf_counter()
+    for position in positions:
+        simulation.lander.rect.center = position
+        simulation.check_hits()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+# Measures the median time create_meteor_storm takes to place a storm of the given number of meteors, as recorded in
+# last_storm_placement_time. Every storm is placed in a fresh simulation, so the earlier storms do not add up.
+def bench_storm_placement(settings, meteor_count, repeat):
+    times = []
+    for x in range(repeat):
+        simulation = Simulation(settings, 1, x)
+        simulation.create_meteor_storm(settings, meteor_count)
+        times.append(simulation.last_storm_placement_time)
+    return statistics.median(times) * 1000
+
+
+# Measures the time of a single Instruments.update call while a mission is being played.
+def bench_instruments(settings, calls):
+    simulation = Simulation(settings, 1, 1)
+    instruments = Instruments(simulation.lander, settings, 0)
+    elapsed = 0
+    for x in range(calls):
+        simulation.step(settings, ["Thrust"] if simulation.lander.velocity_y > 60 else [])
+        if simulation.is_over():
+            simulation = Simulation(settings, 1, x)
+        start = time.perf_counter()
+        instruments.update(simulation, settings)
+        elapsed += time.perf_counter() - start
+    return elapsed / calls * 1000
+
+
+# Measures the time MarsLander.__init__ takes in a fresh interpreter, including the imports it needs.
+def bench_startup():
+    code = ("import time\n"
+            "start = time.perf_counter()\n"
+            "from mars_lander import MarsLander\n"
+            "MarsLander()\n"
+            "print(time.perf_counter() - start)\n")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(result.stdout.split()[-1]) * 1000
+
+
+# Runs all the benchmarks and returns the results as a dictionary of milliseconds per operation.
+def run_benchmarks(frames, repeat):
+    results = {"startup_ms": statistics.median(bench_startup() for x in range(repeat))}
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((1200, 750))
+    settings = Settings()
+    settings.screen_width, settings.screen_height = screen.get_size()
+    settings.seed = 1
+
+    results["frame_ms"] = bench_frames(settings, screen, frames)
+    results["mission_setup_ms"] = median_time(lambda: Mission(settings, 0, 5, 3, 1), repeat * 10)
+    results["menu_setup_ms"] = median_time(lambda: MenuScreen(settings, False, 0), repeat * 10)
+    for hazard_count in (5, 50, 100, 250, 500):
+        results["check_hits_%d_ms" % hazard_count] = bench_check_hits(settings, hazard_count, 2000)
+    for meteor_count in (10, 1000):
+        results["storm_placement_%d_ms" % meteor_count] = bench_storm_placement(settings, meteor_count, repeat * 10)
+    results["instruments_update_ms"] = bench_instruments(settings, 2000)
+    return results
+
+
+# Runs the benchmarks, prints their results and compares them with the stored baseline. Returns a non-zero exit code
+# if any result is slower than its baseline by more than the tolerance.
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frame time, mission setup and collision scaling.")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="baseline file to compare with")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative slowdown that counts as a regression (default 0.2)")
+    parser.add_argument("--frames", type=int, default=1000, help="number of game play frames to measure")
+    parser.add_argument("--repeat", type=int, default=3, help="number of repetitions of the setup measurements")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.frames, args.repeat)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    regressions = 0
+    for name, value in results.items():
+        line = "{0:25s} {1:10.3f} ms".format(name, value)
+        if name in baseline:
+            change = value / baseline[name] - 1
+            line += "  {0:+7.1%} vs baseline".format(change)
+            if change > args.tolerance:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+
+    if args.save:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print("Saved the results as the baseline in %s" % args.baseline)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
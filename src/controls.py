@@ -0,0 +1,63 @@
+import pygame
+import time
+from profiler import frame_profiler
+
+
+# This class turns the state of the keyboard into the controls to engage at every simulation tick. The held keys are
+# sampled once per tick, so the controls take effect at the simulation rate whatever the frame rate or the operating
+# system's key repeat. A control is engaged as soon as its key goes down and then once per repeat interval while
+# the key is held, which keeps the feel of the 25 ms key repeat the game used to rely on. The times at which controls
+# were engaged are kept until the frame showing their effect is presented, to measure the input latency.
+class InputSampler:
+    bindings = [(pygame.K_LEFT, "Left"), (pygame.K_RIGHT, "Right"), (pygame.K_SPACE, "Thrust")]
+
+    def __init__(self, repeat_interval):
+        self.repeat_interval = repeat_interval
+
+        # The time (in milliseconds) each control has been held since it was last engaged, None if not held.
+        self.held = {control: None for key, control in self.bindings}
+
+        # The controls whose keys went down since the last sample.
+        self.pressed = set()
+
+        # The times of the samples which engaged controls, until their effect is presented.
+        self.pending = []
+
+    # Notes the key presses among the events of a tick, so that presses shorter than a tick are not missed.
+    def note_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            for key, control in self.bindings:
+                if event.key == key:
+                    self.pressed.add(control)
+
+    # Returns the controls to engage during a tick lasting dt milliseconds.
+    def sample(self, dt):
+        keys = pygame.key.get_pressed()
+        controls = []
+        for key, control in self.bindings:
+
+            # Engage the control once right away when its key goes down.
+            if control in self.pressed or (keys[key] and self.held[control] is None):
+                controls.append(control)
+                self.held[control] = 0 if keys[key] else None
+
+            # Engage it once more for every repeat interval it is held for.
+            elif keys[key]:
+                self.held[control] += dt
+                while self.held[control] >= self.repeat_interval:
+                    controls.append(control)
+                    self.held[control] -= self.repeat_interval
+            else:
+                self.held[control] = None
+        self.pressed.clear()
+
+        if controls:
+            self.pending.append(time.perf_counter())
+        return controls
+
+    # Records the latency of the controls engaged since the last presented frame, now that a frame showing
+    # their effect has been presented at the given time.
+    def frame_presented(self, present_time):
+        for sample_time in self.pending:
+            frame_profiler.add_latency(present_time - sample_time)
+        self.pending.clear()
@@ -0,0 +1,84 @@
+import pygame
+import os
+import json
+import threading
+from assets import cache_path, write_atomically
+
+
+# This class hands out shared font objects, creating each (family, size, bold, italic) combination only once per
+# process. Resolving a family name to a font file requires a scan of the system fonts, so the resolved file of every
+# (family, bold, italic) combination is also kept in a file of the cache folder, and later launches load the font
+# files directly without scanning at all. Families which were not found are only remembered until the process
+# exits, so that a font installed later is picked up by the next launch. The lock guards the registry because
+# MissionPrefetcher builds missions, fonts included, on a worker thread.
+class FontRegistry:
+    def __init__(self, path):
+        self.path = path
+        self.fonts = {}
+        self.lock = threading.Lock()
+
+        # Maps "family|bold|italic" to the font file found for it and to whether bold and italic have to be emulated
+        # because the file lacks those styles. The families not found, which fall back to pygame's default font
+        # (a None file), are kept apart and never written to the cache file.
+        self.resolved = {}
+        self.missing = {}
+        if os.path.isfile(path):
+            try:
+                with open(path) as cache:
+                    self.resolved = {key: entry for key, entry in json.load(cache).items() if entry[0] is not None}
+            except (OSError, ValueError, TypeError, IndexError, AttributeError):
+                self.resolved = {}
+
+        # The number of system font scans done by this process.
+        self.scans = 0
+
+    # Returns the shared font of the given family, size and style.
+    def get_font(self, family, size, bold=False, italic=False):
+        key = (family, size, bold, italic)
+        with self.lock:
+            if key not in self.fonts:
+                font_file, set_bold, set_italic = self.resolve(family, bold, italic)
+                font = pygame.font.Font(font_file, size)
+                font.bold = set_bold
+                font.italic = set_italic
+                self.fonts[key] = font
+            return self.fonts[key]
+
+    # Returns the font file of the given family and style and whether bold and italic have to be emulated,
+    # scanning the system fonts only if the family is not in the cache or its file has disappeared since.
+    def resolve(self, family, bold, italic):
+        key = "%s|%d|%d" % (family, bold, italic)
+        if key in self.missing:
+            return self.missing[key]
+        entry = self.resolved.get(key)
+        if entry is None or not os.path.isfile(entry[0]):
+
+            # Let SysFont do the search, catching its choice instead of creating a font.
+            found = []
+            pygame.font.SysFont(family, 1, bold, italic,
+                                constructor=lambda font_file, size, set_bold, set_italic:
+                                found.append([font_file, set_bold, set_italic]))
+            self.scans += 1
+            entry = found[0]
+            if entry[0] is None:
+                self.missing[key] = entry
+            else:
+                self.resolved[key] = entry
+                self.save()
+        return entry
+
+    # Writes the resolved font files to the cache file, leaving it out if the cache folder is not writable.
+    def save(self):
+        try:
+            write_atomically(self.path, json.dumps(self.resolved, indent=1, sort_keys=True).encode())
+        except OSError:
+            pass
+
+
+# The registry shared by the whole game.
+font_registry = FontRegistry(os.path.join(cache_path, "fonts.json"))
+
+
+# Returns the shared font of the given family, size and style.
+def get_font(family, size, bold=False, italic=False):
+    return font_registry.get_font(family, size, bold, italic)
@@ -1,21 +1,19 @@
-import pygame
-import os
-import random
-from visuals import Breather, RedGreenMixer
+from assets import asset_registry
+from visuals import Breather, RedGreenMixer, text_cache
+from fonts import get_font
 
 
-# This class is responsible for managing the various data displayed on the instruments panel of the screen, as well as
-# handling the normal operation and malfunctions of the lander controls.
+# This class is responsible for managing the various data displayed on the instruments panel of the screen.
+# The malfunctions of the lander controls are handled by the Simulation class.
 class Instruments:
     def __init__(self, lander, settings, score):
 
         # Load the background for the instruments panel.
-        self.bg = pygame.image.load(os.path.join("resources", "instruments.png"))
-        self.bg = pygame.transform.smoothscale(self.bg, (350, 115))
+        self.bg = asset_registry.scaled((350, 115), "instruments.png")
 
         # Create fonts for the instruments panel.
-        self.my_instr_font = pygame.font.SysFont('Arial', 20)
-        self.my_alert_font = pygame.font.SysFont('Arial', 30, bold=True)
+        self.my_instr_font = get_font('Arial', 20)
+        self.my_alert_font = get_font('Arial', 30, bold=True)
 
         # Create Breather and Mixer objects to handle the multicolored font of fuel and alert display.
         self.breather = Breather("fast")
@@ -23,109 +21,89 @@ class Instruments:
 
         # Initialise instrument panel values.
         self.time = 0
-        self.time_text = self.my_instr_font.render("{0:5.1f}".format(round(self.time / 1000, 1)),
-                                                   True, (200, 200, 200))
         self.fuel = lander.fuel
-        self.fuel_text = self.my_instr_font.render("{0:5d}".format(lander.fuel, 2),
-                                                   True, (self.mixer.red_fuel, self.mixer.green_fuel, 0))
         self.damage = lander.damage
-        self.damage_text = self.my_instr_font.render("{0:5d}".format(lander.damage, 2),
-                                                     True, (self.mixer.red_damage, self.mixer.green_damage, 0))
-        self.altitude_text = self.my_instr_font.render("{0:5.0f}".format((settings.screen_height
-                                                                          - lander.rect.bottom)
-                                                                         * (1000 / (settings.screen_height
-                                                                                    - lander.rect.height))),
-                                                       True, (200, 200, 200))
-        self.velocity_x_text = self.my_instr_font.render("{0:5.1f}".format(round(lander.velocity_x, 2)),
-                                                         True, (200, 200, 200))
-        self.velocity_y_text = self.my_instr_font.render("{0:5.1f}".format(round(lander.velocity_y, 2)),
-                                                         True, (200, 200, 200))
         self.score = score
-        self.score_text = self.my_instr_font.render("{0:5.0f}".format(self.score),
-                                                    True, (255, 255, 0))
-        self.alert_text = self.my_alert_font.render("* ALERT! *", True, (self.breather.color_value, 0, 0))
+        self.alert_text_white = text_cache.render(self.my_alert_font, "* ALERT! *", (255, 255, 255))
+        self.alert_text = text_cache.modulate(self.alert_text_white, (self.breather.color_value, 0, 0))
+        self.render_values(lander, settings)
 
-        # This variable shows which of the controls is malfunctioning at the current moment.
+        # This variable mirrors the control which is malfunctioning at the current moment.
         self.failure = "None"
 
-        # The time when the last malfunction occurred.
-        self.failure_time = 0
+        # The fields last drawn by draw_changes() and the screen areas they covered, keyed on the field names.
+        self.drawn_fields = {}
+        self.drawn_areas = {}
 
-    # Main update function of the Instruments class. Called once per frame, it randomly generates control failures,
-    # as well as updates the various data displayed on the panel.
-    def update(self, clock, lander, settings, difficulty_level):
-        # Update the time passed.
-        self.time += clock.get_time()
-
-        # Set all controls as malfunctioning if the lander has sustained 100% damage.
-        if lander.damage == 100:
-            self.failure = "Total"
-            lander.thruster.is_active = False
-
-        # If no control is malfunctioning at the current moment, generate a random control failure
-        # with a chance which is dependant on the current mission difficulty level
-        # and store the moment at which it occurred.
-        if self.failure == "None":
-            unlucky_factor = random.randint(1, 2400 - 160 * difficulty_level)
-            if unlucky_factor == 1:
-                self.failure = "Left"
-            elif unlucky_factor == 2:
-                self.failure = "Right"
-            if unlucky_factor <= 2:
-                self.failure_time = self.time
-
-        # If a single control was malfunctioning, fix it if 2 seconds have passed.
-        elif self.failure != "Total":
-            if self.time - self.failure_time > 2000:
-                self.failure = "None"
+    # Main update function of the Instruments class. Called once per frame, it updates the various data displayed
+    # on the panel from the current state of the simulated mission.
+    def update(self, simulation, settings):
+        lander = simulation.lander
+        self.time = simulation.time
+        self.failure = simulation.failure
 
         # Update instruments panel data.
-        self.time_text = self.my_instr_font.render("{0:5.1f}".format(round(self.time / 1000, 1)),
-                                                   True, (200, 200, 200))
         self.fuel = lander.fuel
         self.mixer.mix_fuel(self.fuel)
-        self.fuel_text = self.my_instr_font.render("{0:5d}".format(lander.fuel, 2),
-                                                   True, (self.mixer.red_fuel, self.mixer.green_fuel, 0))
         self.damage = lander.damage
         self.mixer.mix_damage(self.damage)
-        self.damage_text = self.my_instr_font.render("{0:5d}".format(lander.damage, 2),
-                                                     True, (self.mixer.red_damage, self.mixer.green_damage, 0))
-        self.altitude_text = self.my_instr_font.render("{0:5.0f}".format((settings.screen_height - lander.rect.bottom)
-                                                                         * (1000 / (settings.screen_height
-                                                                                    - lander.rect.height))),
-                                                       True, (200, 200, 200))
-        self.velocity_x_text = self.my_instr_font.render("{0:5.1f}".format(round(lander.velocity_x, 2)),
-                                                         True, (200, 200, 200))
-        self.velocity_y_text = self.my_instr_font.render("{0:5.1f}".format(round(lander.velocity_y, 2)),
-                                                         True, (200, 200, 200))
+        self.render_values(lander, settings)
         if self.failure != "None":
             self.breather.breathe()
-            self.alert_text = self.my_alert_font.render("* ALERT! *", True, (self.breather.color_value, 0, 0))
-
-    # Draws instruments panel data on the screen
-    def draw(self, screen):
-        screen.blit(self.bg, (0, 0))
-        screen.blit(self.time_text, (100, 10))
-        screen.blit(self.fuel_text, (100, 32))
-        screen.blit(self.damage_text, (100, 54))
-        screen.blit(self.score_text, (100, 81))
-        screen.blit(self.altitude_text, (280, 10))
-        screen.blit(self.velocity_x_text, (280, 32))
-        screen.blit(self.velocity_y_text, (280, 54))
+            self.alert_text = text_cache.modulate(self.alert_text_white, (self.breather.color_value, 0, 0))
+
+    # Gets the text surfaces of the panel values from the text cache, which only renders the values that changed.
+    def render_values(self, lander, settings):
+        font = self.my_instr_font
+        self.time_text = text_cache.render(font, "{0:5.1f}".format(round(self.time / 1000, 1)), (200, 200, 200))
+        self.fuel_text = text_cache.render(font, "{0:5.0f}".format(lander.fuel),
+                                           (self.mixer.red_fuel, self.mixer.green_fuel, 0))
+        self.damage_text = text_cache.render(font, "{0:5d}".format(lander.damage, 2),
+                                             (self.mixer.red_damage, self.mixer.green_damage, 0))
+        self.altitude_text = text_cache.render(font, "{0:5.0f}".format((settings.screen_height - lander.rect.bottom)
+                                                                       * (1000 / (settings.screen_height
+                                                                                  - lander.rect.height))),
+                                               (200, 200, 200))
+        self.velocity_x_text = text_cache.render(font, "{0:5.0f}".format(lander.velocity_x), (200, 200, 200))
+        self.velocity_y_text = text_cache.render(font, "{0:5.0f}".format(lander.velocity_y), (200, 200, 200))
+        self.score_text = text_cache.render(font, "{0:5.0f}".format(self.score), (255, 255, 0))
+
+    # Redraws only the panel fields that changed since the previous call, restoring the panel background underneath
+    # them from the given static layer, and returns the list of screen areas that were updated. Unchanged fields are
+    # only redrawn where a restored area overlaps them. All the fields are redrawn when forced, for example after
+    # something else was drawn over the panel.
+    def draw_changes(self, screen, static_layer, force):
+        fields = self.fields()
+        changed = {name for name in self.drawn_fields.keys() | fields.keys()
+                   if force or fields.get(name) != self.drawn_fields.get(name)}
+        if not changed:
+            return []
+
+        # Restore the background under the changed fields.
+        restored = []
+        for name in changed:
+            if name in self.drawn_areas:
+                area = self.drawn_areas.pop(name)
+                restored.append(screen.blit(static_layer, area, area))
+
+        # Draw the changed fields and the unchanged ones partly erased by the restored areas.
+        dirty = list(restored)
+        for name, (text, pos) in fields.items():
+            if name in changed or self.drawn_areas[name].collidelist(restored) != -1:
+                self.drawn_areas[name] = screen.blit(text, pos)
+                dirty.append(self.drawn_areas[name])
+        self.drawn_fields = fields
+        return dirty
+
+    # Returns the (text surface, position) pair of every field currently visible on the panel, keyed on its name.
+    def fields(self):
+        fields = {"time": (self.time_text, (100, 10)),
+                  "fuel": (self.fuel_text, (100, 32)),
+                  "damage": (self.damage_text, (100, 54)),
+                  "score": (self.score_text, (100, 81)),
+                  "altitude": (self.altitude_text, (280, 10)),
+                  "velocity_x": (self.velocity_x_text, (280, 32)),
+                  "velocity_y": (self.velocity_y_text, (280, 54))}
         if self.failure != "None":
-            screen.blit(self.alert_text, (172, 77))
-
-    # Activates left turn control if functional
-    def engage_left_control(self, lander):
-        if self.failure != "Left" and self.failure != "Total":
-            lander.turn("Left")
-
-    # Activates right turn control if functional
-    def engage_right_control(self, lander):
-        if self.failure != "Right" and self.failure != "Total":
-            lander.turn("Right")
-
-    # Activates thruster control if functional
-    def engage_thrust_control(self, lander):
-        if self.failure != "Thrust" and self.failure != "Total":
-            lander.accelerate()
+            fields["alert"] = (self.alert_text, (172, 77))
+        return fields
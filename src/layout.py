@@ -0,0 +1,150 @@
+import pygame
+import math
+import numpy as np
+from assets import asset_registry
+
+
+# This class holds everything needed to lay out a mission at a given screen resolution: the scaled spawn points of
+# the landing pads and obstacles, and for every possible landing pad placement the positions at which each obstacle
+# would overlap that pad. All of it is computed once, so sampling a mission layout takes no collision tests and no
+# retries.
+class MissionLayout:
+    def __init__(self, settings):
+        scale_x = settings.screen_width / 1200
+        scale_y = settings.screen_height / 750
+
+        # For each one of the 3 landing pads there are 4 possible spawn locations.
+        self.pad_spawn_points = [(975 * scale_x, 699 * scale_y), (1122 * scale_x, 750 * scale_y),
+                                 (1022 * scale_x, 750 * scale_y), (913 * scale_x, 750 * scale_y),
+                                 (743 * scale_x, 750 * scale_y), (514 * scale_x, 750 * scale_y),
+                                 (642 * scale_x, 750 * scale_y), (425 * scale_x, 617 * scale_y),
+                                 (245 * scale_x, 750 * scale_y), (167 * scale_x, 750 * scale_y),
+                                 (82 * scale_x, 750 * scale_y), (254 * scale_x, 436 * scale_y)]
+
+        # The rect and mask of every landing pad placement, keyed on (spawn point index, is tall).
+        self.pad_placements = {}
+        for index, spawn_point in enumerate(self.pad_spawn_points):
+            for is_tall in (False, True):
+                image_name = "pad_tall.png" if is_tall else "pad.png"
+                rect = asset_registry.image("landingPads", image_name).get_rect()
+                rect.centery = spawn_point[1] - rect.height / 2
+                rect.centerx = spawn_point[0]
+                self.pad_placements[(index, is_tall)] = (rect, asset_registry.mask("landingPads", image_name))
+
+        # The satellites are placed anywhere within a region of the upper-left and upper-right portion of the screen.
+        # Each region is given as the inclusive ranges of the satellite's centre coordinates.
+        self.regions = {"satellite_SE": ((math.floor(50 * scale_x), math.floor(480 * scale_x)),
+                                         (math.floor(170 * scale_y), math.floor(325 * scale_y))),
+                        "satellite_SW": ((math.floor(635 * scale_x), math.floor(1130 * scale_x)),
+                                         (math.floor(70 * scale_y), math.floor(400 * scale_y)))}
+        self.blocked_positions = {}
+        for image in self.regions:
+            self.blocked_positions[image] = {key: self.block_positions(image, rect, mask)
+                                             for key, (rect, mask) in self.pad_placements.items()}
+
+        # Compute the valid satellite positions of every combination of landing pads in advance.
+        self.valid_positions = {}
+        for first_pad in range(0, 4):
+            for second_pad in range(4, 8):
+                for third_pad in range(8, 12):
+                    for tall in range(8):
+                        pads = [(first_pad, tall & 1 > 0), (second_pad, tall & 2 > 0), (third_pad, tall & 4 > 0)]
+                        for image in self.regions:
+                            self.satellite_positions(image, pads)
+
+        # The building dome, rocks and pipe are placed at one of a few possible spawn points. Only the dome can
+        # overlap a landing pad, so the overlapping pad placements of each dome spawn point are noted.
+        self.dome_spawn_points = [(85 * scale_x, 586 * scale_y), (226 * scale_x, 436 * scale_y),
+                                  (452 * scale_x, 587 * scale_y)]
+        self.rocks_spawn_points = [(560 * scale_x, 570 * scale_y), (695 * scale_x, 595 * scale_y)]
+        self.pipe_spawn_points = [(1075 * scale_x, 590 * scale_y), (1130 * scale_x, 520 * scale_y)]
+        dome_mask = asset_registry.mask("obstacles", "building_dome.png")
+        self.dome_overlaps = []
+        for spawn_point in self.dome_spawn_points:
+            dome_rect = asset_registry.image("obstacles", "building_dome.png").get_rect(center=spawn_point)
+            self.dome_overlaps.append({key for key, (rect, mask) in self.pad_placements.items()
+                                       if mask.overlap(dome_mask, (dome_rect.x - rect.x, dome_rect.y - rect.y))})
+
+    # Returns a boolean array over the region of the given satellite image, marking the centre positions at which
+    # the satellite overlaps the given landing pad, or None if there are no such positions.
+    def block_positions(self, image, pad_rect, pad_mask):
+        obstacle_mask = asset_registry.mask("obstacles", image + ".png")
+        width, height = obstacle_mask.get_size()
+        (left, right), (top, bottom) = self.regions[image]
+
+        # Bit (i, j) of the convolution is set when the satellite overlaps the pad with its lower right corner at (i, j)
+        # relative to the pad, which puts its centre at the following offsets from the convolution's origin.
+        convolution = pygame.surfarray.array_red(pad_mask.convolve(obstacle_mask).to_surface()) > 0
+        origin_x = pad_rect.x - width + 1 + width // 2
+        origin_y = pad_rect.y - height + 1 + height // 2
+
+        # Intersect the convolution with the region.
+        x_from = max(left, origin_x)
+        x_to = min(right + 1, origin_x + convolution.shape[0])
+        y_from = max(top, origin_y)
+        y_to = min(bottom + 1, origin_y + convolution.shape[1])
+        if x_from >= x_to or y_from >= y_to:
+            return None
+        blocked = np.zeros((right - left + 1, bottom - top + 1), dtype=bool)
+        blocked[x_from - left:x_to - left, y_from - top:y_to - top] = \
+            convolution[x_from - origin_x:x_to - origin_x, y_from - origin_y:y_to - origin_y]
+        if not blocked.any():
+            return None
+        return blocked
+
+    # Returns the flat indices of the region positions where the given satellite overlaps none of the given pads,
+    # or None if none of the pads reaches into the region. The indices are memoized per combination of the pads
+    # which do reach into the region, of which there are only a few.
+    def satellite_positions(self, image, pads):
+        blocking_pads = tuple(sorted(pad for pad in pads if self.blocked_positions[image][pad] is not None))
+        if not blocking_pads:
+            return None
+        key = (image, blocking_pads)
+        if key not in self.valid_positions:
+            blocked = np.logical_or.reduce([self.blocked_positions[image][pad] for pad in blocking_pads])
+            self.valid_positions[key] = np.flatnonzero(~blocked).astype(np.int32)
+        return self.valid_positions[key]
+
+    # Randomly picks a mission layout using the given random number generator. Returns the landing pads as
+    # (spawn point, is tall) pairs and the obstacles as (centre position, image name) pairs.
+    def sample(self, rng):
+
+        # Pick a tall or normal landing pad with a 50% chance, at one of 4 spawn points for each of the 3 pads.
+        pads = []
+        for pos in range(3):
+            is_tall = rng.randint(1, 100) >= 51
+            pads.append((rng.randint(pos * 4, pos * 4 + 3), is_tall))
+
+        # Place a satellite in the upper-left and another one in the upper-right portion of the screen,
+        # at any position that does not overlap a landing pad.
+        obstacles = []
+        for image in ("satellite_SE", "satellite_SW"):
+            (left, right), (top, bottom) = self.regions[image]
+            positions = self.satellite_positions(image, pads)
+            if positions is None:
+                position = rng.randrange((right - left + 1) * (bottom - top + 1))
+            else:
+                position = int(positions[rng.randrange(len(positions))])
+            obstacles.append(((left + position // (bottom - top + 1), top + position % (bottom - top + 1)), image))
+
+        # Place the building dome at one of the spawn points that do not overlap a landing pad.
+        dome_choices = [index for index, overlaps in enumerate(self.dome_overlaps) if overlaps.isdisjoint(pads)]
+        obstacles.append((self.dome_spawn_points[rng.choice(dome_choices)], "building_dome"))
+
+        # Place the rocks and the pipe at one of their spawn points.
+        obstacles.append((self.rocks_spawn_points[rng.randint(0, 1)], "rocks_ore_SW"))
+        obstacles.append((self.pipe_spawn_points[rng.randint(0, 1)], "pipe_stand_SE"))
+
+        return [(self.pad_spawn_points[index], is_tall) for index, is_tall in pads], obstacles
+
+
+# Mission layouts already computed, keyed on the screen resolution.
+layouts = {}
+
+
+# Returns the mission layout for the screen resolution of the given settings, computing it on first use.
+def get_layout(settings):
+    resolution = (settings.screen_width, settings.screen_height)
+    if resolution not in layouts:
+        layouts[resolution] = MissionLayout(settings)
+    return layouts[resolution]
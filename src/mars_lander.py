@@ -1,50 +1,235 @@
+import time
+
+# The time at which the game module started loading, for the startup report.
+import_start = time.perf_counter()
+
+import sys
+import random
+import argparse
+import atexit
 import pygame
 from settings import Settings
-from screens import MenuScreen
+from profiler import frame_profiler
+from assets import asset_registry, surface_lock
 
 
 # Main game class.
 class MarsLander:
-    def __init__(self):
+    def __init__(self, settings=None):
+        start = time.perf_counter()
 
-        # Initialise the pygame module.
-        pygame.init()
+        # Use the given Settings object or create one to hold the screen dimensions, starting number of lives,
+        # desired FPS and simulation rate.
+        self.settings = settings if settings is not None else Settings()
 
-        # Create a Settings object to hold the screen dimensions, starting number of lives and desired FPS.
-        self.settings = Settings()
+        # Initialise only the pygame modules the game uses. pygame.init() would also start the mixer, joystick
+        # and other subsystems, which only slow the startup down.
+        pygame.display.init()
 
         # Create a display screen.
         if self.settings.fullscreen_mode:
             self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
         else:
-            self.screen = pygame.display.set_mode((1200, 750))
+            self.screen = pygame.display.set_mode((self.settings.window_width, self.settings.window_height))
+        pygame.display.set_caption("Mars Lander")
         screen_width, screen_height = pygame.display.get_surface().get_size()
         self.settings.screen_width = screen_width
         self.settings.screen_height = screen_height
+        display_ready = time.perf_counter()
 
         # Initialise pygame fonts.
         pygame.font.init()
 
-        # Create a menu (pre-game) screen as the first active screen.
+        # Time the phases of every frame if profiling or its overlay is on, writing the frame times out when the game
+        # exits if profiling is.
+        if self.settings.profile or self.settings.profile_overlay:
+            frame_profiler.enable()
+        if self.settings.profile:
+            atexit.register(frame_profiler.dump, self.settings.profile_output)
+
+        # Print the load statistics of the assets when the game exits if asked to.
+        if self.settings.report_assets:
+            atexit.register(asset_registry.print_report)
+
+        # Create a menu (pre-game) screen as the first active screen. The screens are imported only now, since
+        # they pull in everything a mission needs.
+        from screens import MenuScreen
         self.active_screen = MenuScreen(self.settings, False, 0)
 
-    # Main game loop.
+        # The startup times (in seconds) of the phases done so far, the first frame is added once it is shown.
+        self.startup_times = {"imports": start - import_start, "display": display_ready - start,
+                              "menu": time.perf_counter() - display_ready}
+        self.startup_reported = False
+
+    # Prints the time each phase of the startup took, from loading this module until the first frame was shown.
+    def report_startup(self):
+        self.startup_reported = True
+        total = time.perf_counter() - import_start
+        self.startup_times["first frame"] = total - sum(self.startup_times.values())
+        print("startup " + ", ".join("{0:s} {1:.0f} ms".format(phase, seconds * 1000)
+                                     for phase, seconds in self.startup_times.items()) +
+              ", total {0:.0f} ms".format(total * 1000))
+
+    # Main game loop. The active screen is progressed in fixed ticks at the simulation rate while drawing happens
+    # at the rendered FPS, and the time left until the next tick or frame is slept away instead of busy waiting.
     def play(self):
+        tick_length = 1 / self.settings.simulation_hz
+        frame_length = 1 / self.settings.FPS
+        previous_time = time.perf_counter()
+        next_frame_time = previous_time
+        lag = 0
         while True:
+            current_time = time.perf_counter()
+            lag += current_time - previous_time
+            previous_time = current_time
+
+            # Simulate a single tick per loop when running at unlimited speed.
+            if self.settings.unlimited_speed:
+                lag = tick_length
+
+            # Progress the active screen by as many ticks as the time passed allows, dropping the time that
+            # cannot be caught up with (e.g. after waiting for a key press).
+            ticks = 0
+            while lag >= tick_length:
+                self.active_screen.play(self.settings)
+
+                # Decide whether to switch the currently active screen or keep at it.
+                self.active_screen = self.active_screen.select_next_active_screen(self.settings)
+
+                lag -= tick_length
+                ticks += 1
+                if ticks == self.settings.max_catch_up_ticks:
+                    lag = 0
+                    previous_time = time.perf_counter()
+                    break
+
+            # Draw the active screen once a frame is due.
+            current_time = time.perf_counter()
+            if current_time >= next_frame_time:
+
+                # Draw the active screen, which returns the changed screen areas or None if it was redrawn completely.
+                # The shared surfaces must not be locked by the mission prefetcher meanwhile.
+                frame_profiler.start()
+                with surface_lock:
+                    dirty_areas = self.active_screen.draw(self.screen, self.settings)
+
+                # Draw the profiler's table of frame times over the screen.
+                if self.settings.profile_overlay and frame_profiler.enabled:
+                    overlay_area = frame_profiler.draw_overlay(self.screen)
+                    if dirty_areas is not None:
+                        dirty_areas.append(overlay_area)
+                frame_profiler.mark("draw")
+
+                # Flip the display, or only the parts of it that changed.
+                if dirty_areas is None:
+                    pygame.display.update()
+                else:
+                    pygame.display.update(dirty_areas)
+                frame_profiler.mark("display")
+                frame_profiler.end_frame()
+                self.active_screen.frame_presented(time.perf_counter())
+
+                if self.settings.report_startup and not self.startup_reported:
+                    self.report_startup()
+
+                # Schedule the next frame, without trying to catch up with frames that were missed.
+                next_frame_time = max(next_frame_time + frame_length, current_time)
+
+            # Sleep until either the next tick or the next frame is due.
+            if not self.settings.unlimited_speed:
+                next_tick_time = previous_time + tick_length - lag
+                time.sleep(max(0, min(next_tick_time, next_frame_time) - time.perf_counter()))
+
+
+# Runs missions without a display, flown by one of the simulated pilots, and prints their outcomes.
+def run_headless(settings, missions, level, pilot_name):
+    from simulation import Simulation
+    from sweeper import pilots
+    session_rng = random.Random(settings.seed)
+    landed = 0
+    start = time.perf_counter()
+    for x in range(missions):
+        seed = session_rng.getrandbits(32)
+        simulation = Simulation(settings, level, seed)
+        simulation.run(settings, pilots[pilot_name](seed), 60 * settings.simulation_hz)
+        landed += simulation.lander.has_landed
+        print("level {0:3d} seed {1:10d} {2:8s} after {3:5.1f} s, damage {4:3d} fuel {5:4.0f}".format(
+            level, seed, "landed" if simulation.lander.has_landed else "crashed" if simulation.lander.has_crashed
+            else "timeout", simulation.time / 1000, simulation.lander.damage, simulation.lander.fuel))
+    print("{0:d} of {1:d} missions landed in {2:.2f} s".format(landed, missions, time.perf_counter() - start))
+
+
+# Parses a WIDTHxHEIGHT resolution of the command line.
+def resolution(text):
+    try:
+        width, height = (int(size) for size in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected WIDTHxHEIGHT, got %r" % text)
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("width and height must be positive, got %r" % text)
+    return width, height
+
+
+# Parses a positive number of the command line.
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a number, got %r" % text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("must be positive, got %r" % text)
+    return value
+
 
-            # Progress the active screen.
-            self.active_screen.play(self.settings)
+# Parses the command line into Settings and starts the game, or runs headless missions.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mars Lander")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--windowed", action="store_true", help="play in a window (default)")
+    mode.add_argument("--fullscreen", action="store_true", help="play in full screen")
+    mode.add_argument("--headless", action="store_true", help="run missions with a simulated pilot, without a display")
+    parser.add_argument("--resolution", type=resolution, default="1200x750",
+                        help="window size, or mission size when headless")
+    parser.add_argument("--fps", type=positive_int, help="rendered frames per second")
+    parser.add_argument("--simulation-hz", type=positive_int, help="simulation ticks per second")
+    parser.add_argument("--unlimited-speed", action="store_true",
+                        help="simulate the ticks as fast as possible instead of in real time")
+    parser.add_argument("--seed", type=int, help="seed of the missions, random by default")
+    parser.add_argument("--profile", action="store_true", help="write per-frame phase times to profile.csv on exit")
+    parser.add_argument("--profile-overlay", action="store_true", help="show the percentiles of the phase times")
+    parser.add_argument("--report-startup", action="store_true", help="print the startup time of each phase")
+    parser.add_argument("--report-assets", action="store_true",
+                        help="print the load count and time of every asset on exit")
+    parser.add_argument("--missions", type=int, default=10, help="number of headless missions")
+    parser.add_argument("--level", type=int, default=1, help="level of the headless missions")
+    parser.add_argument("--pilot", choices=["random", "scripted"], default="scripted",
+                        help="pilot of headless missions")
+    args = parser.parse_args(argv)
 
-            # Draw the active screen.
-            self.active_screen.draw(self.screen, self.settings)
+    settings = Settings()
+    settings.fullscreen_mode = args.fullscreen
+    settings.window_width, settings.window_height = args.resolution
+    if args.fps is not None:
+        settings.FPS = args.fps
+    if args.simulation_hz is not None:
+        settings.simulation_hz = args.simulation_hz
+    settings.unlimited_speed = args.unlimited_speed
+    settings.seed = args.seed
+    settings.profile = args.profile
+    settings.profile_overlay = args.profile_overlay
+    settings.report_startup = args.report_startup
+    settings.report_assets = args.report_assets
 
-            # Decide whether to switch the currently active screen or keep at it.
-            self.active_screen = self.active_screen.select_next_active_screen(self.settings)
+    if args.headless:
+        settings.screen_width, settings.screen_height = settings.window_width, settings.window_height
+        run_headless(settings, args.missions, args.level, args.pilot)
+        return 0
 
-            # Flip the display.
-            pygame.display.update()
+    # Initialise the game and enjoy!
+    mars_lander = MarsLander(settings)
+    mars_lander.play()
+    return 0
 
 
-# Initialise the game and enjoy!
-mars_lander = MarsLander()
-mars_lander.play()
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import pygame
+import numpy as np
+from assets import asset_registry
+
+
+# This class holds all the meteors of a mission as a structure of arrays: the top left corners of their rects,
+# their velocities, the index of their image, the storm they belong to and whether they are touching the lander.
+# All the meteors are moved and the ones that left the screen are culled in a single vectorized pass per tick,
+# and the lander is tested against all of them at once by their bounding boxes before the exact mask tests,
+# so the cost per meteor stays tiny even for showers of thousands of them.
+#
+# Storms are tracked explicitly: a storm begins when its meteors are spawned and ends on the tick its last
+# meteor leaves the screen.
+class MeteorField:
+    def __init__(self, settings, capacity=64):
+        self.damage_caused = settings.meteor_damage
+
+        # The meteors move this many pixels down and away from the side of the screen they spawned from every tick,
+        # meteor_speed pixels per second rounded to whole pixels per tick.
+        self.speed = round(settings.meteor_speed / settings.simulation_hz)
+
+        # The shared images and masks of the meteors, and the width and height of each image.
+        self.image_names = ["spaceMeteors_00%d.png" % n for n in range(1, 5)]
+        self.images = [asset_registry.image("meteors", name) for name in self.image_names]
+        self.masks = [asset_registry.mask("meteors", name) for name in self.image_names]
+        self.sizes = np.array([image.get_size() for image in self.images], dtype=np.int32)
+
+        # The arrays of the meteors, of which the first count entries are in use, and their names.
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.velocity_x = np.zeros(capacity, dtype=np.int32)
+        self.velocity_y = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.width = np.zeros(capacity, dtype=np.int32)
+        self.height = np.zeros(capacity, dtype=np.int32)
+        self.storm = np.zeros(capacity, dtype=np.int32)
+        self.touching = np.zeros(capacity, dtype=bool)
+        self.arrays = ("x", "y", "velocity_x", "velocity_y", "kind", "width", "height", "storm", "touching")
+
+        # The storms in progress, mapped to the mission time at which they began, and the id of the next storm.
+        self.storms = {}
+        self.next_storm = 0
+
+    def __len__(self):
+        return self.count
+
+    # Returns the width and height of the image of the given kind.
+    def size_of(self, kind):
+        return tuple(int(value) for value in self.sizes[kind])
+
+    # Begins a new storm at the given mission time, made of meteors with the given image kinds centred at the given
+    # positions, all of them moving away from the given side of the screen. Returns the id of the storm.
+    def spawn_storm(self, time, centres, kinds, spawns_from):
+        storm = self.next_storm
+        self.next_storm += 1
+        self.storms[storm] = time
+
+        # Grow the arrays as needed.
+        needed = self.count + len(centres)
+        if needed > len(self.x):
+            capacity = max(needed, 2 * len(self.x))
+            for name in self.arrays:
+                array = getattr(self, name)
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:self.count] = array[:self.count]
+                setattr(self, name, grown)
+
+        # Place the rects the same way pygame positions a rect by its centre.
+        new = slice(self.count, needed)
+        kinds = np.array(kinds, dtype=np.int8)
+        centres = np.array(centres, dtype=np.int32).reshape(-1, 2)
+        self.x[new] = centres[:, 0] - self.sizes[kinds, 0] // 2
+        self.y[new] = centres[:, 1] - self.sizes[kinds, 1] // 2
+        self.velocity_x[new] = -self.speed if spawns_from == "Right" else self.speed
+        self.velocity_y[new] = self.speed
+        self.kind[new] = kinds
+        self.width[new] = self.sizes[kinds, 0]
+        self.height[new] = self.sizes[kinds, 1]
+        self.storm[new] = storm
+        self.touching[new] = False
+        self.count = needed
+        return storm
+
+    # Moves all the meteors and removes the ones that have passed the screen bottom or the screen side they were
+    # heading to. Returns the ids of the storms whose last meteor was removed.
+    def update(self, settings):
+        n = self.count
+        if n == 0:
+            return []
+        x, y = self.x[:n], self.y[:n]
+        x += self.velocity_x[:n]
+        y += self.velocity_y[:n]
+
+        # Meteors heading right leave past the right side, the ones heading left once their right edge is past
+        # the left side.
+        gone = (y > settings.screen_height) | np.where(self.velocity_x[:n] > 0, x > settings.screen_width,
+                                                       x + self.width[:n] < 0)
+        if not gone.any():
+            return []
+        kept = np.flatnonzero(~gone)
+        for name in self.arrays:
+            array = getattr(self, name)
+            array[:len(kept)] = array[kept]
+        self.count = len(kept)
+
+        # End the storms which have no meteors left.
+        remaining = set(np.unique(self.storm[:self.count]).tolist())
+        ended = [storm for storm in self.storms if storm not in remaining]
+        for storm in ended:
+            del self.storms[storm]
+        return ended
+
+    # Returns the indices of the meteors whose rects overlap the given rect.
+    def overlapping(self, rect):
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        return np.flatnonzero((x < rect.right) & (x + self.width[:n] > rect.left) &
+                              (y < rect.bottom) & (y + self.height[:n] > rect.top))
+
+    # Returns the indices of the meteors whose rects overlapped the given rect at any time during the last tick, the
+    # rect having moved by the given displacement to its current position. The rect's path is taken relative to each
+    # meteor, whose own move during the tick is undone.
+    def swept(self, rect, displacement):
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        moved_x = displacement[0] - self.velocity_x[:n]
+        moved_y = displacement[1] - self.velocity_y[:n]
+        return np.flatnonzero((x < rect.right - np.minimum(moved_x, 0)) &
+                              (x + self.width[:n] > rect.left - np.maximum(moved_x, 0)) &
+                              (y < rect.bottom - np.minimum(moved_y, 0)) &
+                              (y + self.height[:n] > rect.top - np.maximum(moved_y, 0)))
+
+    # Returns the indices of the meteors whose masks overlap the mask of the given sprite.
+    def hits(self, sprite):
+        return [index for index in self.overlapping(sprite.rect).tolist()
+                if sprite.mask.overlap(self.masks[self.kind[index]],
+                                       (int(self.x[index]) - sprite.rect.x, int(self.y[index]) - sprite.rect.y))]
+
+    # Returns the rect of the meteor at the given index.
+    def rect(self, index):
+        return pygame.Rect(int(self.x[index]), int(self.y[index]), *self.size_of(self.kind[index]))
+
+    # Returns the displacement of the meteor at the given index during a tick.
+    def velocity(self, index):
+        return int(self.velocity_x[index]), int(self.velocity_y[index])
+
+    # Draws all the meteors and returns the list of screen areas that were drawn.
+    def draw(self, screen):
+        images = self.images
+        return screen.blits([(images[kind], (x, y)) for x, y, kind in
+                             zip(self.x[:self.count].tolist(), self.y[:self.count].tolist(),
+                                 self.kind[:self.count].tolist())])
@@ -0,0 +1,160 @@
+import pygame
+import math
+import time
+import numpy as np
+
+
+# This class animates the particles of the visual effects: the thruster's exhaust, the sparks of impacts and the debris
+# of crashes. The particles live in preallocated arrays holding at most settings.particle_budget of them, new ones
+# being dropped once the arrays are full. All of them are moved, aged and culled in a few vectorized operations per
+# tick and written straight into the screen's pixels per frame. The time spent on them is measured, and fewer
+# particles are spawned while it exceeds settings.particle_frame_budget milliseconds per frame.
+class ParticleSystem:
+
+    # The particle kinds, each with the color of a new particle and the color it fades to by the end of its life.
+    kinds = {"exhaust": 0, "spark": 1, "debris": 2}
+    colors = np.array([[(255, 240, 150), (180, 40, 0)],
+                       [(255, 255, 255), (255, 170, 0)],
+                       [(230, 180, 120), (60, 50, 45)]], dtype=np.float32)
+
+    # The downward acceleration of each kind, in pixels per second squared.
+    gravity = np.array([0.0, 720.0, 540.0], dtype=np.float32)
+
+    def __init__(self, settings):
+        self.budget = settings.particle_budget
+        self.frame_budget = settings.particle_frame_budget
+        self.rng = np.random.default_rng()
+
+        # The arrays of the particles, of which the first count entries are in use. Positions and velocities are
+        # in pixels and pixels per second, lives in milliseconds.
+        self.count = 0
+        self.x = np.zeros(self.budget, dtype=np.float32)
+        self.y = np.zeros(self.budget, dtype=np.float32)
+        self.velocity_x = np.zeros(self.budget, dtype=np.float32)
+        self.velocity_y = np.zeros(self.budget, dtype=np.float32)
+        self.life = np.zeros(self.budget, dtype=np.float32)
+        self.lifetime = np.ones(self.budget, dtype=np.float32)
+        self.kind = np.zeros(self.budget, dtype=np.int8)
+        self.arrays = ("x", "y", "velocity_x", "velocity_y", "life", "lifetime", "kind")
+
+        # The share of the requested particles actually spawned, lowered while the particles are over their budget.
+        self.spawn_scale = 1.0
+
+        # The time spent on the particles since the last frame and the average time per frame (in milliseconds).
+        self.elapsed = 0.0
+        self.frame_cost = 0.0
+
+    # Removes all the particles.
+    def clear(self):
+        self.count = 0
+
+    # Spawns particles for an event recorded by the simulation.
+    def emit(self, event):
+        start = time.perf_counter()
+        kind = event[0]
+
+        # The exhaust leaves the nozzle at the bottom of the lander, opposite to the lander's heading,
+        # and carries the lander's own velocity.
+        if kind == "exhaust":
+            x, y, angle, velocity_x, velocity_y, height = event[1:]
+            direction = math.radians(angle)
+            nozzle_x = x + math.sin(-direction) * -height / 2
+            nozzle_y = y + math.cos(direction) * height / 2
+            self.spawn("exhaust", 12, nozzle_x, nozzle_y, 90 - angle, 25, (180, 420), (250, 500), velocity_x,
+                       velocity_y)
+
+        # Sparks fly in every direction from the point of impact.
+        elif kind == "impact":
+            x, y = event[1:]
+            self.spawn("spark", 40, x, y, 0, 180, (120, 480), (200, 600))
+
+        # Debris is thrown up and sideways from the wreck.
+        elif kind == "crash":
+            x, y = event[1:]
+            self.spawn("debris", 300, x, y, -90, 80, (60, 600), (1000, 2500))
+        self.elapsed += time.perf_counter() - start
+
+    # Spawns the given number of particles of a kind at a point, scaled down while over budget. They move at a random
+    # speed from the given range, towards a random direction within spread degrees of the given angle (0 pointing
+    # right, 90 down), on top of the given base velocity, and live for a random time from the given range.
+    def spawn(self, kind, number, x, y, angle, spread, speeds, lives, base_velocity_x=0.0, base_velocity_y=0.0):
+        number = min(int(number * self.spawn_scale), self.budget - self.count)
+        if number <= 0:
+            return
+        new = slice(self.count, self.count + number)
+        directions = np.radians(angle + self.rng.uniform(-spread, spread, number))
+        speed = self.rng.uniform(speeds[0], speeds[1], number)
+        self.x[new] = x
+        self.y[new] = y
+        self.velocity_x[new] = base_velocity_x + np.cos(directions) * speed
+        self.velocity_y[new] = base_velocity_y + np.sin(directions) * speed
+        self.lifetime[new] = self.rng.uniform(lives[0], lives[1], number)
+        self.life[new] = self.lifetime[new]
+        self.kind[new] = self.kinds[kind]
+        self.count += number
+
+    # Moves and ages the particles by a tick of dt milliseconds, culling the ones which died or left the screen.
+    def update(self, settings, dt):
+        n = self.count
+        if n == 0:
+            return
+        start = time.perf_counter()
+        x, y, velocity_y, life = self.x[:n], self.y[:n], self.velocity_y[:n], self.life[:n]
+        seconds = dt / 1000
+        x += self.velocity_x[:n] * seconds
+        y += velocity_y * seconds
+        velocity_y += self.gravity[self.kind[:n]] * seconds
+        life -= dt
+        alive = (life > 0) & (x >= 0) & (x < settings.screen_width - 1) & (y >= 0) & (y < settings.screen_height - 1)
+        if not alive.all():
+            kept = np.flatnonzero(alive)
+            for name in self.arrays:
+                array = getattr(self, name)
+                array[:len(kept)] = array[kept]
+            self.count = len(kept)
+        self.elapsed += time.perf_counter() - start
+
+    # Draws the particles as 2x2 pixel squares fading from their kind's first color to its last, and returns the
+    # bounding rects of each kind's particles as the screen areas that were drawn. Afterwards the particles' average
+    # cost per frame is updated and the spawn rate adjusted to it.
+    def draw(self, screen):
+        start = time.perf_counter()
+        drawn = []
+        n = self.count
+        if n:
+            x = self.x[:n].astype(np.intp)
+            y = self.y[:n].astype(np.intp)
+            kind = self.kind[:n]
+
+            # Blend the colors by the age of every particle.
+            age = (1 - self.life[:n] / self.lifetime[:n])[:, np.newaxis]
+            colors = (self.colors[kind, 0] * (1 - age) + self.colors[kind, 1] * age).astype(np.uint32)
+
+            if screen.get_bytesize() == 4:
+                shifts = screen.get_shifts()
+                losses = screen.get_losses()
+                mapped = ((colors[:, 0] >> losses[0]) << shifts[0] | (colors[:, 1] >> losses[1]) << shifts[1] |
+                          (colors[:, 2] >> losses[2]) << shifts[2] | np.uint32(screen.get_masks()[3]))
+                pixels = pygame.surfarray.pixels2d(screen)
+                for offset_x, offset_y in ((0, 0), (1, 0), (0, 1), (1, 1)):
+                    pixels[x + offset_x, y + offset_y] = mapped
+                del pixels
+            else:
+                for color, position in zip(colors.tolist(), zip(x.tolist(), y.tolist())):
+                    screen.fill(color, (position, (2, 2)))
+
+            for index in range(len(self.kinds)):
+                of_kind = kind == index
+                if of_kind.any():
+                    left, top = int(x[of_kind].min()), int(y[of_kind].min())
+                    drawn.append(pygame.Rect(left, top, int(x[of_kind].max()) - left + 2,
+                                             int(y[of_kind].max()) - top + 2))
+
+        # Keep a running average of the cost per frame and spawn fewer particles while it is over budget.
+        self.frame_cost = 0.9 * self.frame_cost + 0.1 * (self.elapsed + time.perf_counter() - start) * 1000
+        self.elapsed = 0.0
+        if self.frame_cost > self.frame_budget:
+            self.spawn_scale = max(0.05, self.spawn_scale * 0.9)
+        else:
+            self.spawn_scale = min(1.0, self.spawn_scale * 1.02)
+        return drawn
@@ -0,0 +1,127 @@
+import pygame
+import json
+import time
+from array import array
+from visuals import text_cache
+
+
+# This class measures how long each phase of the main loop takes in every frame. The time between two calls to
+# mark() is added to the named phase of the current frame, and end_frame() stores the frame in a fixed-size ring
+# buffer holding the most recent frames. While disabled every call returns immediately, so the instrumentation
+# can stay in place at no measurable cost.
+class FrameProfiler:
+    def __init__(self, phases, capacity=1000):
+        self.phases = phases
+        self.capacity = capacity
+        self.enabled = False
+
+        # One ring buffer of frame times (in seconds) per phase, the position of the next frame in the buffers
+        # and the number of frames stored so far.
+        self.samples = {phase: array("d", [0.0] * capacity) for phase in phases}
+        self.index = 0
+        self.count = 0
+
+        # A ring buffer of input latencies (in seconds), from sampling a control to presenting its effect.
+        self.latencies = array("d", [0.0] * capacity)
+        self.latency_index = 0
+        self.latency_count = 0
+
+        # The times of the phases of the frame in progress and the time of the last mark.
+        self.current = dict.fromkeys(phases, 0.0)
+        self.last = 0.0
+
+        # The overlay surface and the frame count at which it was last rendered.
+        self.overlay = None
+        self.overlay_frame = -1
+        self.overlay_font = None
+
+    def enable(self):
+        self.enabled = True
+        self.last = time.perf_counter()
+
+    # Starts timing from now on, without adding the time passed since the last mark to any phase.
+    def start(self):
+        if self.enabled:
+            self.last = time.perf_counter()
+
+    # Adds the time passed since the last mark to the given phase of the current frame.
+    def mark(self, phase):
+        if self.enabled:
+            now = time.perf_counter()
+            self.current[phase] += now - self.last
+            self.last = now
+
+    # Stores the phase times of the current frame in the ring buffers and starts a new frame.
+    def end_frame(self):
+        if self.enabled:
+            for phase in self.phases:
+                self.samples[phase][self.index] = self.current[phase]
+                self.current[phase] = 0.0
+            self.index = (self.index + 1) % self.capacity
+            self.count += 1
+
+    # Stores the latency of an input whose effect was presented on screen.
+    def add_latency(self, latency):
+        if self.enabled:
+            self.latencies[self.latency_index] = latency
+            self.latency_index = (self.latency_index + 1) % self.capacity
+            self.latency_count += 1
+
+    # Returns the 50th, 95th and 99th percentile of the given phase's frame times, or of the input latencies
+    # if no phase is given, in milliseconds.
+    def percentiles(self, phase=None):
+        if phase is None:
+            stored = sorted(self.latencies[:min(self.latency_count, self.capacity)])
+        else:
+            stored = sorted(self.samples[phase][:min(self.count, self.capacity)])
+        if not stored:
+            return 0.0, 0.0, 0.0
+        return tuple(stored[min(len(stored) - 1, int(len(stored) * share))] * 1000 for share in (0.5, 0.95, 0.99))
+
+    # Draws a table of the phase percentiles at the top left corner of the screen and returns the area it covers.
+    # The table is refreshed twice per second at 60 FPS.
+    def draw_overlay(self, screen):
+        if self.overlay is None or self.count - self.overlay_frame >= 30:
+            if self.overlay_font is None:
+                self.overlay_font = pygame.font.Font(None, 18)
+            lines = ["{0:14s}{1:>8s}{2:>8s}{3:>8s}".format("phase (ms)", "p50", "p95", "p99")]
+            for phase in self.phases:
+                lines.append("{0:14s}{1:8.2f}{2:8.2f}{3:8.2f}".format(phase, *self.percentiles(phase)))
+            lines.append("{0:14s}{1:8.2f}{2:8.2f}{3:8.2f}".format("input latency", *self.percentiles()))
+            texts = [text_cache.render(self.overlay_font, line, (255, 255, 255)) for line in lines]
+
+            # The overlay never shrinks, so that it always covers what it showed before.
+            width = max([text.get_width() + 10 for text in texts] + [self.overlay.get_width() if self.overlay else 0])
+            self.overlay = pygame.Surface((width, 14 * len(texts) + 10))
+            for row, text in enumerate(texts):
+                self.overlay.blit(text, (5, 5 + 14 * row))
+            self.overlay_frame = self.count
+        return screen.blit(self.overlay, (0, 0))
+
+    # Writes the stored frames, oldest first, to the given file: as a table of per-phase times in milliseconds
+    # if its name ends with .csv, otherwise as JSON with the percentiles, the times of every phase and the input
+    # latencies.
+    def dump(self, path):
+        stored = min(self.count, self.capacity)
+        start = self.index - stored
+        frames = [[self.samples[phase][(start + frame) % self.capacity] * 1000 for phase in self.phases]
+                  for frame in range(stored)]
+        with open(path, "w") as dump:
+            if path.endswith(".csv"):
+                dump.write(",".join(["frame"] + self.phases) + "\n")
+                for frame, times in enumerate(frames):
+                    dump.write(",".join([str(frame)] + ["%.4f" % value for value in times]) + "\n")
+            else:
+                json.dump({"phases": self.phases,
+                           "percentiles": {phase: dict(zip(("p50", "p95", "p99"), self.percentiles(phase)))
+                                           for phase in self.phases},
+                           "frames": frames,
+                           "input_latency": dict(zip(("p50", "p95", "p99"), self.percentiles())),
+                           "input_latencies": [latency * 1000 for latency in
+                                               self.latencies[:min(self.latency_count, self.capacity)]]},
+                          dump, indent=1)
+
+
+# The profiler of the main loop, shared by the whole game.
+frame_profiler = FrameProfiler(["events", "lander", "hazards", "check_hits", "check_landing", "instruments",
+                                "particles", "draw", "display"])
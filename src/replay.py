@@ -0,0 +1,121 @@
+import argparse
+import struct
+import time
+from settings import Settings
+from simulation import Simulation, decode_controls
+
+
+# This class records a game session as the seed, level and input log of each of its missions, together with the
+# screen resolution and simulation rate they were played at. That is all a headless Simulation needs to re-execute
+# the session exactly, tick by tick.
+class SessionLog:
+
+    # The file starts with a magic number, the format version, the screen size, the simulation rate and the number
+    # of missions. Each mission follows with its seed, level, score, lives, outcome and the length of its input log,
+    # followed by the input log itself.
+    header_format = "<4sBHHHI"
+    mission_format = "<IHiiBI"
+    magic = b"MLRP"
+    version = 1
+
+    def __init__(self, screen_width, screen_height, simulation_hz):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.simulation_hz = simulation_hz
+
+        # Each mission is kept as a list of seed, level, score, lives, outcome and input log. The outcome stays 0
+        # until the mission is finished.
+        self.missions = []
+
+    # Starts recording the given mission. Its input log keeps growing as it is played.
+    def record(self, mission, score, lives):
+        self.missions.append([mission.seed, mission.level, score, lives, 0, mission.input_log])
+
+    # Notes the outcome (see outcome_of()) of the mission being recorded once it has ended.
+    def finish(self, outcome):
+        self.missions[-1][4] = outcome
+
+    # Returns the session in its binary format, as written to a session log file.
+    def pack(self):
+        records = [struct.pack(self.header_format, self.magic, self.version, self.screen_width,
+                               self.screen_height, self.simulation_hz, len(self.missions))]
+        for seed, level, score, lives, outcome, input_log in self.missions:
+            records.append(struct.pack(self.mission_format, seed, level, score, lives, outcome, len(input_log)))
+            records.append(input_log)
+        return b"".join(records)
+
+    # Returns Settings matching the ones the session was recorded with.
+    def settings(self):
+        settings = Settings()
+        settings.screen_width = self.screen_width
+        settings.screen_height = self.screen_height
+        settings.simulation_hz = self.simulation_hz
+        return settings
+
+
+# Reads a session log from the given file.
+def load_session_log(path):
+    with open(path, "rb") as save:
+        data = save.read()
+    magic, version, screen_width, screen_height, simulation_hz, mission_count = \
+        struct.unpack_from(SessionLog.header_format, data)
+    if magic != SessionLog.magic or version != SessionLog.version:
+        raise ValueError("%s is not a version %d session log" % (path, SessionLog.version))
+    log = SessionLog(screen_width, screen_height, simulation_hz)
+    offset = struct.calcsize(SessionLog.header_format)
+    for x in range(mission_count):
+        seed, level, score, lives, outcome, length = struct.unpack_from(SessionLog.mission_format, data, offset)
+        offset += struct.calcsize(SessionLog.mission_format)
+        log.missions.append([seed, level, score, lives, outcome, bytes(data[offset:offset + length])])
+        offset += length
+    return log
+
+
+# Returns 1 if the mission ended with a landing, 2 if it ended with a crash and 0 if it had not ended.
+def outcome_of(simulation):
+    if simulation.lander.has_landed:
+        return 1
+    elif simulation.lander.has_crashed:
+        return 2
+    return 0
+
+
+# Re-executes a single logged mission headless and returns the simulation in its final state.
+def replay_mission(settings, seed, level, input_log):
+    simulation = Simulation(settings, level, seed)
+    for controls in decode_controls(input_log):
+        simulation.step(settings, controls)
+    return simulation
+
+
+# Replays a session log the given number of times as fast as possible, printing the outcome of every mission
+# and whether it matches the recorded one.
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded Mars Lander session headless.")
+    parser.add_argument("path", nargs="?", default="last_session.replay", help="session log to replay")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times to replay the session")
+    args = parser.parse_args()
+
+    log = load_session_log(args.path)
+    settings = log.settings()
+    outcomes = {0: "unfinished", 1: "landed", 2: "crashed"}
+    start = time.perf_counter()
+    ticks = 0
+    diverged = 0
+    for x in range(args.repeat):
+        for seed, level, score, lives, outcome, input_log in log.missions:
+            simulation = replay_mission(settings, seed, level, input_log)
+            ticks += simulation.ticks
+            if outcome_of(simulation) != outcome:
+                diverged += 1
+            if x == 0:
+                print("level {0:3d} seed {1:10d} ticks {2:6d} {3:10s} damage {4:3d} fuel {5:4.0f}".format(
+                    level, seed, simulation.ticks, outcomes[outcome_of(simulation)], simulation.lander.damage,
+                    simulation.lander.fuel))
+    elapsed = time.perf_counter() - start
+    print("replayed {0:d} ticks in {1:.2f} s ({2:.1f}x real time), {3:d} diverging missions".format(
+        ticks, elapsed, ticks / settings.simulation_hz / elapsed, diverged))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import os
+import sys
+import atexit
+import struct
+import threading
+from assets import write_atomically
+
+
+# The file holding the game to continue.
+saved_game_path = "saved_game.save"
+
+
+# This class holds the state a game can be continued from: the level, score and lives reached, the seed of the
+# session's random generator from that point on and the statistics of every level played so far.
+class SavedGame:
+
+    # The file starts with a magic number, the format version, the level, score, lives and seed and the number of
+    # level records. Each level record follows with the level, the number of landings and crashes on it and the
+    # shortest landing time in milliseconds (0 if it was never landed).
+    header_format = "<4sBHiBIH"
+    level_format = "<HHHI"
+    magic = b"MLSV"
+    version = 1
+
+    def __init__(self, level, score, lives, seed=None, level_stats=None):
+        self.level = level
+        self.score = score
+        self.lives = lives
+
+        # The seed is None for games saved by older versions of the game, which did not keep it.
+        self.seed = seed
+
+        # Maps each level played to its [landings, crashes, best landing time] statistics.
+        self.level_stats = level_stats if level_stats is not None else {}
+
+    # Returns the saved game in its binary format.
+    def pack(self):
+        records = [struct.pack(self.header_format, self.magic, self.version, self.level, self.score, self.lives,
+                               self.seed, len(self.level_stats))]
+        for level in sorted(self.level_stats):
+            records.append(struct.pack(self.level_format, level, *self.level_stats[level]))
+        return b"".join(records)
+
+
+# Reads the saved game from the given file, written in the binary format or as the "level score lives" text of older
+# versions of the game. Returns None if there is no saved game or if it cannot be read.
+def load_saved_game(path):
+    try:
+        with open(path, "rb") as save:
+            data = save.read()
+    except OSError:
+        return None
+
+    if not data.startswith(SavedGame.magic):
+        try:
+            level, score, lives = (int(value) for value in data.split()[:3])
+        except ValueError:
+            return None
+        return SavedGame(level, score, lives)
+
+    try:
+        magic, version, level, score, lives, seed, level_count = struct.unpack_from(SavedGame.header_format, data)
+        if version != SavedGame.version:
+            return None
+        saved_game = SavedGame(level, score, lives, seed)
+        offset = struct.calcsize(SavedGame.header_format)
+        for x in range(level_count):
+            level, landings, crashes, best_time = struct.unpack_from(SavedGame.level_format, data, offset)
+            saved_game.level_stats[level] = [landings, crashes, best_time]
+            offset += struct.calcsize(SavedGame.level_format)
+    except struct.error:
+        return None
+    return saved_game
+
+
+# This class writes files on a background thread, so that the game loop never waits for the disk. Every file is
+# replaced atomically: the data goes to a temporary file next to it, which is flushed to the disk and then renamed over
+# it, so that a crash mid-write leaves the previous version intact. At most one operation waits per file, as a later
+# write or removal of a file supersedes the one still waiting for it, which keeps the backlog bounded by the number
+# of files without ever dropping an operation on another file.
+class SaveJournal:
+    def __init__(self):
+
+        # Maps each file to the bytes waiting to be written to it, or to None when it waits to be removed.
+        self.pending = {}
+        self.condition = threading.Condition()
+
+        # The writer thread, started by the first operation, and whether it is carrying one out.
+        self.thread = None
+        self.busy = False
+
+        # The number of operations superseded before they were carried out, and the error of every file whose last
+        # operation failed, until flush() hands them out.
+        self.superseded = 0
+        self.failures = {}
+
+    # Queues the given bytes to be written to the given file.
+    def write(self, path, data):
+        self.put(path, data)
+
+    # Queues the removal of the given file.
+    def remove(self, path):
+        self.put(path, None)
+
+    # Queues an operation on the given file, replacing the one still waiting for it.
+    def put(self, path, data):
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="save-journal", daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+            if path in self.pending:
+                self.superseded += 1
+            self.pending[path] = data
+            self.condition.notify_all()
+
+    # Waits until all the queued operations are done and returns a dictionary mapping every file whose last operation
+    # failed since the previous flush to its error.
+    def flush(self):
+        with self.condition:
+            while self.pending or self.busy:
+                self.condition.wait()
+            failures = self.failures
+            self.failures = {}
+        return failures
+
+    # The writer thread's loop. A failed operation is reported and kept for flush(), and never stops the thread.
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                path = next(iter(self.pending))
+                data = self.pending.pop(path)
+                self.busy = True
+            try:
+                self.commit(path, data)
+                with self.condition:
+                    self.failures.pop(path, None)
+            except Exception as error:
+                print("Could not {0} {1}: {2}".format("remove" if data is None else "write", path, error),
+                      file=sys.stderr)
+                with self.condition:
+                    self.failures[path] = error
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    # Atomically replaces the given file with the given bytes, or removes it if there are none.
+    def commit(self, path, data):
+        if data is None:
+            if os.path.isfile(path):
+                os.remove(path)
+            return
+        write_atomically(path, data, durable=True)
+
+
+# The journal shared by the whole game.
+save_journal = SaveJournal()
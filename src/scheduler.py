@@ -0,0 +1,44 @@
+import heapq
+import math
+
+
+# This class fires the callbacks of events at the times they were scheduled for. The events are kept in a heap ordered
+# on their time, then on the order in which they were scheduled, so that events due at the same time fire in that
+# order. next_time holds the time of the earliest event (infinity when there is none), which lets the owner check
+# whether anything is due with a single comparison and lets headless jobs see how far ahead the next event lies.
+# Cancelled events stay in the heap and are skipped when they come up.
+class EventScheduler:
+    def __init__(self):
+        self.heap = []
+        self.order = 0
+        self.next_time = math.inf
+
+    # Schedules a call of the given callback at the given time and returns the event, which can be cancelled.
+    def schedule(self, time, callback):
+        event = [time, self.order, callback]
+        self.order += 1
+        heapq.heappush(self.heap, event)
+        self.next_time = self.heap[0][0]
+        return event
+
+    # Cancels a scheduled event.
+    def cancel(self, event):
+        event[2] = None
+
+    # Calls the callbacks of all the events due at the given time with the given arguments, including the events they
+    # schedule which are due as well.
+    def run(self, now, *args):
+        while self.heap and self.heap[0][0] <= now:
+            time, order, callback = heapq.heappop(self.heap)
+            if callback is not None:
+                callback(*args)
+        self.next_time = self.heap[0][0] if self.heap else math.inf
+
+
+# Returns the time until an event which has the given chance of happening at every tick first happens, drawing the
+# number of ticks from the geometric distribution. This is the same as rolling the chance at every tick, but takes
+# a single draw from the given generator.
+def geometric_delay(rng, chance, tick_length):
+    if chance >= 1:
+        return tick_length
+    return tick_length * (1 + int(math.log(1 - rng.random()) / math.log(1 - chance)))
@@ -1,17 +1,22 @@
 import sys
-import os
-import pygame
 import random
-from visuals import Breather
-from mission import Mission
+import pygame
+from assets import asset_registry
+from visuals import Breather, text_cache
+from fonts import get_font
+from mission import mission_prefetcher, peek_seed
+from replay import SessionLog, outcome_of
+from saves import SavedGame, load_saved_game, save_journal, saved_game_path
+from profiler import frame_profiler
+from controls import InputSampler
+from particles import ParticleSystem
 
 
 # Parent class of menu and game play screens.
 class Screen:
     def __init__(self, settings):
-        # Load the screens's background image.
-        self.bg = pygame.image.load(os.path.join("resources", "mars_background.png"))
-        self.bg = pygame.transform.smoothscale(self.bg, (settings.screen_width, settings.screen_height))
+        # Get the screens's background image, scaled to the screen size.
+        self.bg = asset_registry.scaled((settings.screen_width, settings.screen_height), "mars_background.png")
         return
 
     # Overridden in MenuScreen/GamePlayScreen classes.
@@ -26,6 +31,10 @@ class Screen:
     def select_next_active_screen(self):
         return
 
+    # Overridden in GamePlayScreen class.
+    def frame_presented(self, present_time):
+        return
+
 
 # This class represents the function and visualisation of the pre-game and post-game menu screens.
 class MenuScreen(Screen):
@@ -38,7 +47,7 @@ class MenuScreen(Screen):
         self.game_over = game_over
 
         # Load a lander image to be used as a selection cursor for the menu options.
-        self.cursor = pygame.image.load(os.path.join("resources", "lander.png"))
+        self.cursor = asset_registry.image("lander.png")
 
         # Initialise menu text fields and fonts.
         self.selected = "left_choice"
@@ -50,40 +59,48 @@ class MenuScreen(Screen):
             self.title = "Mars Lander"
             self.left_choice = "New Game"
             self.right_choice = "Continue"
-        self.my_error_font = pygame.font.SysFont("Arial", 25)
-        self.my_menu_font = pygame.font.SysFont("Comic Sans MS", 40)
-        self.my_title_font = pygame.font.SysFont("Comic Sans MS", 50, bold=True)
-        self.my_instructions_font = pygame.font.SysFont("Comic Sans MS", 20, bold=True, italic=True)
-        self.my_credits_font = pygame.font.SysFont("Comic Sans MS", 30, bold=True, italic=True)
+        self.my_menu_font = get_font("Comic Sans MS", 40)
+        self.my_title_font = get_font("Comic Sans MS", 50, bold=True)
         self.title_text = self.my_title_font.render(self.title, True, (255, 255, 255))
         self.title_text_rect = self.title_text.get_rect(center=(settings.screen_width / 2,
                                                                 settings.screen_height / 4))
-        self.left_choice_text = self.my_menu_font.render(self.left_choice, True, (255, 255, 255))
+        self.left_choice_text_white = text_cache.render(self.my_menu_font, self.left_choice, (255, 255, 255))
+        self.left_choice_text = self.left_choice_text_white
         self.left_choice_text_rect = self.left_choice_text.get_rect(center=(settings.screen_width / 2 - 150,
                                                                             settings.screen_height * 3 / 5))
         self.left_choice_text_color = 0
-        self.right_choice_text = self.my_menu_font.render(self.right_choice, True, (255, 255, 255))
+        self.right_choice_text_white = text_cache.render(self.my_menu_font, self.right_choice, (255, 255, 255))
+        self.right_choice_text = self.right_choice_text_white
         self.right_choice_text_rect = self.right_choice_text.get_rect(center=(settings.screen_width / 2 + 150,
                                                                               settings.screen_height * 3 / 5))
         self.right_choice_text_color = 0
         self.final_score = final_score
-        self.final_score_text = self.my_menu_font.render("Score: {0:5d}".format(self.final_score), True, (255, 255, 0))
-        self.final_score_text_rect = self.final_score_text.get_rect(center=(settings.screen_width / 2,
-                                                                            settings.screen_height * 17 / 40))
-        self.instructions_text = ["How to play:",
-                                  "Carefully descend upon one of the three landing pads while"
-                                  " avoiding meteors and obstacles.", "Use [LEFT] and [RIGHT] arrow keys to rotate the"
-                                                                      " lander and [SPACE] to fire the thruster.",
-                                  "[ESC] quits the game.", "Good Luck!"]
-        self.multi_text = []
-        for line in self.instructions_text:
-            self.multi_text.append(self.my_instructions_font.render(line, True, (50, 50, 50)))
-        self.error_text = self.my_error_font.render("No saved game found.", True, (255, 0, 0))
-        self.error_text_rect = self.error_text.get_rect(center=(settings.screen_width / 2 + 150,
-                                                                settings.screen_height * 3 / 5 + 50))
-        self.credits_text = self.my_credits_font.render("Developed by Vince", True, (50, 50, 50))
-        self.credits_text_rect = self.credits_text.get_rect(center=(settings.screen_width / 2,
-                                                                            settings.screen_height - 30))
+
+        # Only the texts shown by this kind of menu are rendered, each font being created when first needed.
+        if self.game_over:
+            self.my_credits_font = get_font("Comic Sans MS", 30, bold=True, italic=True)
+            self.final_score_text = self.my_menu_font.render("Score: {0:5d}".format(self.final_score), True,
+                                                             (255, 255, 0))
+            self.final_score_text_rect = self.final_score_text.get_rect(center=(settings.screen_width / 2,
+                                                                                settings.screen_height * 17 / 40))
+            self.credits_text = self.my_credits_font.render("Developed by Vince", True, (50, 50, 50))
+            self.credits_text_rect = self.credits_text.get_rect(center=(settings.screen_width / 2,
+                                                                        settings.screen_height - 30))
+        else:
+            self.my_instructions_font = get_font("Comic Sans MS", 20, bold=True, italic=True)
+            self.instructions_text = ["How to play:",
+                                      "Carefully descend upon one of the three landing pads while"
+                                      " avoiding meteors and obstacles.", "Use [LEFT] and [RIGHT] arrow keys to rotate"
+                                                                          " the lander and [SPACE] to fire the"
+                                                                          " thruster.",
+                                      "[ESC] quits the game.", "Good Luck!"]
+            self.multi_text = []
+            for line in self.instructions_text:
+                self.multi_text.append(self.my_instructions_font.render(line, True, (50, 50, 50)))
+
+        # The load game error message is rendered the first time it is shown.
+        self.error_text = None
+        self.error_text_rect = None
 
         # Get the cursor's rectangle and position it atop the left menu choice.
         self.cursor_rect = self.cursor.get_rect()
@@ -101,11 +118,17 @@ class MenuScreen(Screen):
         self.starting_score = 0
         self.starting_level = 1
         self.starting_lives = settings.lives
+        self.starting_stats = {}
+
+        # The random generator of the seeds of the next game's missions, handed over to the game play screen so that
+        # its first mission can be prepared while the menu is shown. Flag set once the preparation has started.
+        self.session_rng = random.Random(settings.seed)
+        self.mission_was_prefetched = False
 
     # Called for each frame from the main game loop, implements the pre-game and post-game menus.
     def play(self, settings):
 
-        # Highlight the default (left) selected menu entry.
+        # Highlight the default (left) selected menu entry by modulating the color of its white rendering.
         self.breather.breathe()
         if self.selected == "left_choice":
             self.left_choice_text_color = self.breather.color_value
@@ -113,10 +136,10 @@ class MenuScreen(Screen):
         elif self.selected == "right_choice":
             self.right_choice_text_color = self.breather.color_value
             self.left_choice_text_color = 255
-        self.left_choice_text = self.my_menu_font.render(self.left_choice, True,
-                                                         (self.left_choice_text_color, self.left_choice_text_color,
-                                                          self.left_choice_text_color))
-        self.right_choice_text = self.my_menu_font.render(self.right_choice, True, (self.right_choice_text_color,
+        self.left_choice_text = text_cache.modulate(self.left_choice_text_white, (self.left_choice_text_color,
+                                                                                  self.left_choice_text_color,
+                                                                                  self.left_choice_text_color))
+        self.right_choice_text = text_cache.modulate(self.right_choice_text_white, (self.right_choice_text_color,
                                                                                     self.right_choice_text_color,
                                                                                     self.right_choice_text_color))
 
@@ -172,8 +195,18 @@ class MenuScreen(Screen):
         screen.blit(self.right_choice_text, self.right_choice_text_rect)
         screen.blit(self.cursor, self.cursor_rect)
         if self.print_error:
+            if self.error_text is None:
+                self.error_text = get_font("Arial", 25).render("No saved game found.", True, (255, 0, 0))
+                self.error_text_rect = self.error_text.get_rect(center=(settings.screen_width / 2 + 150,
+                                                                        settings.screen_height * 3 / 5 + 50))
             screen.blit(self.error_text, self.error_text_rect)
 
+        # Once the menu is up, start preparing the first mission of a new game.
+        if settings.prefetch_missions and not self.mission_was_prefetched:
+            self.mission_was_prefetched = True
+            mission_prefetcher.prefetch(settings, self.starting_score, self.starting_level, self.starting_lives,
+                                        peek_seed(self.session_rng), self.bg)
+
     # Called for each frame from the main game loop, this function handles the transition
     # from the menu screens to the game play screen.
     def select_next_active_screen(self, settings):
@@ -181,7 +214,8 @@ class MenuScreen(Screen):
         # Exit the menu and start the game if either "New Game", "Continue" or "Play Again" was activated.
         if self.game_starts:
             pygame.event.clear()
-            return GamePlayScreen(settings, self.starting_level, self.starting_score, self.starting_lives)
+            return GamePlayScreen(settings, self.starting_level, self.starting_score, self.starting_lives,
+                                  self.session_rng, self.starting_stats)
         else:
             return self
 
@@ -195,86 +229,132 @@ class MenuScreen(Screen):
             self.selected = "left_choice"
             self.cursor_rect.center = (self.left_choice_text_rect.centerx, self.left_choice_text_rect.y - 20)
 
-    # Attempts to load a previously unfinished game.
+    # Attempts to load a previously unfinished game, after the saves still being written have reached the disk.
+    # Games saved by older versions of the game keep the random generator of a new game and start without statistics.
+    # If the last save or removal of the saved game failed, the file on the disk is out of date and is not loaded.
     def load_game(self):
-        if not os.path.isfile("saved_game.save"):
+        if saved_game_path in save_journal.flush():
             return False
-        save = open("saved_game.save", "r")
-        data = save.readlines()
-        if not data:
+        saved_game = load_saved_game(saved_game_path)
+        if saved_game is None:
             return False
-        for line in data:
-            nums = line.split()
-        self.starting_level = int(nums[0])
-        self.starting_score = int(nums[1])
-        self.starting_lives = int(nums[2])
-        save.close()
+        self.starting_level = saved_game.level
+        self.starting_score = saved_game.score
+        self.starting_lives = saved_game.lives
+        self.starting_stats = saved_game.level_stats
+        if saved_game.seed is not None:
+            self.session_rng = random.Random(saved_game.seed)
         return True
 
 
 # This class represents the progression and visualisation of the actual game play.
 class GamePlayScreen(Screen):
-    def __init__(self, settings, level, score, lives):
+    def __init__(self, settings, level, score, lives, session_rng=None, level_stats=None):
 
         # Call parent class init() to load the background image.
         Screen.__init__(self, settings)
 
-        # Initialise text fields and fonts.
-        self.my_message_font = pygame.font.SysFont('Comic Sans MS', 40)
-        self.my_message_font_small = pygame.font.SysFont('Arial', 20)
-        self.crash_message = self.my_message_font.render("You Have Crashed !!!", True, (255, 0, 0))
-        self.crash_message_rect = self.crash_message.get_rect(center=(settings.screen_width / 2,
-                                                                      settings.screen_height / 2))
-        self.landing_message = self.my_message_font.render("Landing Successful !", True, (0, 255, 0))
-        self.landing_message_rect = self.landing_message.get_rect(center=(settings.screen_width / 2,
-                                                                          settings.screen_height / 2))
-        self.press_key_message = self.my_message_font_small.render("press any key to continue", True, (0, 0, 0))
-        self.press_key_message_rect = self.press_key_message.get_rect(center=(settings.screen_width / 2,
-                                                                      settings.screen_height / 2 + 50))
+        # The end of mission messages are rendered when the first mission ends, see render_messages().
+        self.crash_message = None
 
         self.score = score
         self.level = level
         self.lives = lives
 
+        # Every mission gets its own seed drawn from the session's generator, and the seeds and controls
+        # of all the missions are recorded so that the session can be replayed.
+        self.session_rng = session_rng if session_rng is not None else random.Random(settings.seed)
+        self.session_log = SessionLog(settings.screen_width, settings.screen_height, settings.simulation_hz)
+
+        # The landings, crashes and best landing time (in milliseconds, 0 before the first landing) of every level.
+        self.level_stats = level_stats if level_stats is not None else {}
+
+        # The held keys are turned into controls once per tick by the input sampler.
+        self.input_sampler = InputSampler(settings.control_repeat_interval)
+
+        # The particles of the exhaust, impacts and crashes.
+        self.particles = ParticleSystem(settings)
+
+        # Flags set once the current mission's outcome has been counted, and once no more lives remain.
+        self.mission_was_scored = False
+        self.game_is_over = False
+
         # Create a new mission at the given level and with the given starting score.
-        self.mission = Mission(settings, self.score, self.level, self.lives)
+        self.start_mission(settings)
+
+        # The static layer of each mission is put in place on its first frame, the drawn areas hold the screen areas
+        # covered by moving objects during the previous frame.
+        self.static_layer = None
+        self.baked_mission = None
+        self.drawn_areas = []
+
+        # Flag set once the crash or landing message of the current mission has been drawn.
+        self.end_was_drawn = False
 
     # Called for each frame from the main game loop, implements the actual game play.
     def play(self, settings):
 
+        tick_length = 1000 / settings.simulation_hz
+
         # Check if the mission has ended.
         if self.mission.lander.has_crashed or self.mission.lander.has_landed:
 
-            # Disable key repeat.
-            pygame.key.set_repeat(0, 0)
-
-            # Decrease lives if the mission ended with a crash.
-            if self.mission.lander.has_crashed:
-                self.lives -= 1
+            # Keep the particles, like the debris of a crash, moving while the end of the mission is shown.
+            self.particles.update(settings, tick_length)
 
-            # If the mission ended with a landing increase player score and level of next mission.
-            else:
-                self.score += 50
-                self.level += 1
-
-            # Save the game's state (score, level and lives) if it is passed the first level.
-            if not (self.mission.level == 1 and self.mission.lander.has_crashed):
-                self.save_game()
+            # Wait until the final state of the mission has been drawn on the screen.
+            if self.baked_mission is not self.mission or not self.end_was_drawn:
+                return
 
-            self.press_any_key()
+            # Count the outcome of the mission once.
+            if not self.mission_was_scored:
+                self.mission_was_scored = True
+
+                # Decrease lives if the mission ended with a crash.
+                stats = self.level_stats.setdefault(self.mission.level, [0, 0, 0])
+                if self.mission.lander.has_crashed:
+                    self.lives -= 1
+                    stats[1] += 1
+
+                # If the mission ended with a landing increase player score and level of next mission.
+                else:
+                    self.score += 50
+                    self.level += 1
+                    stats[0] += 1
+                    if stats[2] == 0 or self.mission.time < stats[2]:
+                        stats[2] = int(self.mission.time)
+
+                # Save the game's state (score, level and lives) if it is passed the first level.
+                if not (self.mission.level == 1 and self.mission.lander.has_crashed):
+                    self.save_game()
+
+                # Note the outcome of the mission and save the session log for replays.
+                self.session_log.finish(outcome_of(self.mission))
+                save_journal.write("last_session.replay", self.session_log.pack())
+
+                # Start preparing the next mission while the player reads the result.
+                if self.lives > 0 and settings.prefetch_missions:
+                    mission_prefetcher.prefetch(settings, self.score, self.level, self.lives,
+                                                peek_seed(self.session_rng), self.bg)
+
+                # Ignore the keys pressed before the end of the mission was shown.
+                pygame.event.clear()
+
+            # Wait until the user presses any key.
+            if not self.any_key_pressed():
+                return
 
             # End the game and delete checkpoint data if lives are exhausted.
             if self.lives == 0:
                 self.delete_saved_game()
+                self.game_is_over = True
                 return
 
             # Create the next mission.
-            self.mission = Mission(settings, self.score, self.level, self.lives)
-
-        # Force the desired FPS.
-        self.mission.clock.tick_busy_loop(settings.FPS)
+            self.start_mission(settings)
 
         # Handle user keyboard input.
+        frame_profiler.start()
         for event in pygame.event.get():
 
             # Quit the game.
@@ -283,89 +363,130 @@ class GamePlayScreen(Screen):
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 sys.exit()
 
-            # Attempt to navigate to the left.
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_LEFT:
-                self.mission.instruments.engage_left_control(self.mission.lander)
-
-            # Attempt to navigate to the right.
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_RIGHT:
-                self.mission.instruments.engage_right_control(self.mission.lander)
-
-            # Attempt to fire the thruster.
-            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                self.mission.instruments.engage_thrust_control(self.mission.lander)
+            # Let the input sampler note the presses of the control keys.
+            self.input_sampler.note_event(event)
 
             # Disable the thruster's visual when space is released.
-            elif event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
+            if event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
                 self.mission.lander.thruster.is_active = False
 
-        # If not already active, create a meteor storm with a chance which increases as level difficulty increases.
-        if (not self.mission.storm_is_active) and (self.mission.last_storm_end < self.mission.instruments.time - 2000):
-            if random.randint(1, 600 - 55 * self.mission.difficulty_level) == 1:
-                self.mission.create_meteor_storm(settings)
-
-        # Update sprites (meteors/obstacles)
-        self.mission.lander.update(settings)
-        self.mission.hazards.update(settings)
-
-        # Note the time at which the last meteor storm ended.
-        if self.mission.storm_is_active and len(self.mission.hazards) == 5:
-            self.mission.last_storm_end = self.mission.clock.get_time()
-            self.mission.storm_is_active = False
+        # Sample the held keys for the controls to engage during this tick.
+        controls = self.input_sampler.sample(tick_length)
+        frame_profiler.mark("events")
 
-        # Check for collisions between the lander and obstacles/meteors.
-        self.mission.check_hits()
-
-        # Check for collision (landing or crash) between the lander and the landing pads.
-        self.mission.check_landing()
+        # Advance the mission by a single tick.
+        self.mission.step(settings, controls)
 
         # Update the data visible on the instruments panel.
-        self.mission.instruments.update(self.mission.clock, self.mission.lander, settings,
-                                        self.mission.difficulty_level)
-
-    # Called for each frame from the main game loop, renders the in-game objects.
+        self.mission.instruments.update(self.mission, settings)
+        frame_profiler.mark("instruments")
+
+        # Spawn the particles of the tick's events and move all of them.
+        for event in self.mission.events:
+            self.particles.emit(event)
+        self.particles.update(settings, tick_length)
+        frame_profiler.mark("particles")
+
+    # Called for each frame from the main game loop, renders the in-game objects. The background, instruments panel
+    # background, avatar, landing pads and obstacles never move during a mission, so they are baked once per mission
+    # into a static layer. Afterwards only the areas of the moving objects and of the changed panel data are restored
+    # from the static layer and redrawn, and the list of those areas is returned for a partial display update.
+    # None is returned when the whole screen was redrawn.
     def draw(self, screen, settings):
-        screen.blit(self.bg, (0, 0))
-        self.mission.instruments.draw(screen)
-        self.mission.avatar.draw(screen)
-        self.mission.lander.draw(screen)
-        self.mission.landing_sprites.draw(screen)
-        self.mission.hazards.draw(screen)
+        full_redraw = self.baked_mission is not self.mission
+        if full_redraw:
+            if self.mission.static_layer is None:
+                self.mission.bake_static_layer(self.bg)
+            self.static_layer = self.mission.static_layer
+            self.baked_mission = self.mission
+            self.end_was_drawn = False
+            screen.blit(self.static_layer, (0, 0))
+            self.drawn_areas = []
+
+        # Erase the moving objects of the previous frame.
+        dirty = []
+        for area in self.drawn_areas:
+            dirty.append(screen.blit(self.static_layer, area, area))
+
+        # Redraw the panel data, all of it if the erased objects overlapped the panel.
+        panel_was_covered = self.mission.instruments.bg.get_rect().collidelist(self.drawn_areas) != -1
+        dirty += self.mission.instruments.draw_changes(screen, self.static_layer, full_redraw or panel_was_covered)
+
+        # Draw the moving objects.
+        if self.crash_message is None and (self.mission.lander.has_crashed or self.mission.lander.has_landed):
+            self.render_messages(settings)
+        self.drawn_areas = self.particles.draw(screen)
+        self.drawn_areas += self.mission.lander.draw(screen)
+        self.drawn_areas += self.mission.meteor_field.draw(screen)
         if self.mission.lander.has_crashed:
-            screen.blit(self.crash_message, self.crash_message_rect)
-            screen.blit(self.press_key_message, self.press_key_message_rect)
+            self.drawn_areas.append(screen.blit(self.crash_message, self.crash_message_rect))
+            self.drawn_areas.append(screen.blit(self.press_key_message, self.press_key_message_rect))
         elif self.mission.lander.has_landed:
-            screen.blit(self.landing_message, self.landing_message_rect)
-            screen.blit(self.press_key_message, self.press_key_message_rect)
+            self.drawn_areas.append(screen.blit(self.landing_message, self.landing_message_rect))
+            self.drawn_areas.append(screen.blit(self.press_key_message, self.press_key_message_rect))
+        self.end_was_drawn = self.mission.lander.has_crashed or self.mission.lander.has_landed
+
+        if full_redraw:
+            return None
+        return dirty + self.drawn_areas
+
+    # Initialises the fonts and text fields of the end of mission messages.
+    def render_messages(self, settings):
+        self.my_message_font = get_font('Comic Sans MS', 40)
+        self.my_message_font_small = get_font('Arial', 20)
+        self.crash_message = self.my_message_font.render("You Have Crashed !!!", True, (255, 0, 0))
+        self.crash_message_rect = self.crash_message.get_rect(center=(settings.screen_width / 2,
+                                                                      settings.screen_height / 2))
+        self.landing_message = self.my_message_font.render("Landing Successful !", True, (0, 255, 0))
+        self.landing_message_rect = self.landing_message.get_rect(center=(settings.screen_width / 2,
+                                                                          settings.screen_height / 2))
+        self.press_key_message = self.my_message_font_small.render("press any key to continue", True, (0, 0, 0))
+        self.press_key_message_rect = self.press_key_message.get_rect(center=(settings.screen_width / 2,
+                                                                      settings.screen_height / 2 + 50))
+
+    # Called from the main game loop once a frame has been presented, for measuring the input latency.
+    def frame_presented(self, present_time):
+        self.input_sampler.frame_presented(present_time)
 
     # Called for each frame from the main game loop, this function handles the transition
     # from the game play screen to the menu (post-game) screen.
     def select_next_active_screen(self, settings):
 
         # End the game and enter the post-game menu if no more lives remain after a crash.
-        if self.mission.lander.has_crashed and self.lives == 0:
+        if self.game_is_over:
             pygame.event.clear()
             return MenuScreen(settings, True, self.score)
         else:
             return self
 
-    # This function pauses the game until the user presses any key.
-    def press_any_key(self):
-        pygame.event.clear()
-        while True:
-            event = pygame.event.wait()
+    # Starts a new mission at the current level, score and lives, prepared in advance if possible, and starts
+    # recording it.
+    def start_mission(self, settings):
+        self.mission = mission_prefetcher.mission(settings, self.score, self.level, self.lives,
+                                                  self.session_rng.getrandbits(32), self.bg)
+        self.session_log.record(self.mission, self.score, self.lives)
+        self.mission_was_scored = False
+        self.particles.clear()
+
+    # Returns True if any key was pressed since the last call, without waiting for one.
+    def any_key_pressed(self):
+        pressed = False
+        for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
-                return
+                pressed = True
+        return pressed
 
-    # Saves the current game status (mission level, score and remaining lives) to a file.
+    # Saves the current game status (mission level, score, remaining lives, seed and level statistics) to a file,
+    # written in the background by the save journal. The session's generator restarts from the saved seed, so that
+    # a game continued from the save goes on with the same missions as this one.
     def save_game(self):
-        save = open("saved_game.save", "w")
-        save.write("%d %d %d" % (self.level, self.score, self.lives))
-        save.close()
+        seed = self.session_rng.getrandbits(32)
+        self.session_rng.seed(seed)
+        saved_game = SavedGame(self.level, self.score, self.lives, seed, self.level_stats)
+        save_journal.write(saved_game_path, saved_game.pack())
 
-    # Deletes the saved game data.
+    # Deletes the saved game data, after any save still being written.
     def delete_saved_game(self):
-        if os.path.isfile("saved_game.save"):
-            os.remove("saved_game.save")
+        save_journal.remove(saved_game_path)
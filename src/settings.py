@@ -1,9 +1,77 @@
 class Settings:
     def __init__(self):
         self.fullscreen_mode = False
+
+        # The size of the game window when not in full screen mode. The actual screen size is filled in
+        # once the display is created.
+        self.window_width = 1200
+        self.window_height = 750
         self.screen_width = 0
         self.screen_height = 0
         self.lives = 3
         self.FPS = 60
 
+        # The simulation advances in fixed ticks of 1 / simulation_hz seconds, independently of the rendered FPS.
+        # At most max_catch_up_ticks are simulated per rendered frame, the rest of a longer delay is dropped.
+        # With unlimited_speed the ticks are simulated back to back as fast as possible, without any pacing.
+        self.simulation_hz = 60
+        self.max_catch_up_ticks = 5
+        self.unlimited_speed = False
+
+        # The physics, given per second and scaled to the length of a tick, so that simulation_hz changes how finely
+        # the game is simulated but not its speed. Gravity and the thruster accelerate the lander by gravity and thrust
+        # pixels per second squared, the lander turns by turn_rate degrees per second and the thruster burns
+        # fuel_burn units of fuel per second. Meteors fly meteor_speed pixels per second along each axis.
+        self.gravity = 360.0
+        self.thrust = 1188.0
+        self.turn_rate = 60.0
+        self.fuel_burn = 300.0
+        self.meteor_speed = 780.0
+
+        # The difficulty knobs. Difficulty rises with the mission level up to max_difficulty_level. Every sixtieth of
+        # a second a meteor storm starts with a chance of 1 in (storm_odds - storm_odds_per_level * difficulty) and
+        # a control fails with a chance of 2 in (failure_odds - failure_odds_per_level * difficulty). Each meteor
+        # hit causes meteor_damage percent of damage.
+        self.max_difficulty_level = 10
+        self.storm_odds = 600
+        self.storm_odds_per_level = 55
+        self.failure_odds = 2400
+        self.failure_odds_per_level = 160
+        self.meteor_damage = 25
+
+        # With terrain_collision the ridges of the background are solid and the lander crashes into them,
+        # otherwise only the bottom of the screen is.
+        self.terrain_collision = True
+
+        # With swept_collisions the lander is tested against the obstacles, meteors and landing pads all along its path
+        # during a tick instead of only where it ends the tick, so that no move is ever large enough to pass through.
+        self.swept_collisions = True
+
+        # A held control key engages its control right away and then once every control_repeat_interval milliseconds.
+        self.control_repeat_interval = 25
+
+        # At most particle_budget particles of the visual effects exist at once, and fewer of them are spawned while
+        # they take more than particle_frame_budget milliseconds per frame.
+        self.particle_budget = 20000
+        self.particle_frame_budget = 2.0
+
+        # Seed of the random number generator picking the seeds of the missions, random if None.
+        self.seed = None
+
+        # With prefetch_missions the next mission is prepared on a worker thread while the menu or the result
+        # of the previous mission is shown.
+        self.prefetch_missions = True
+
+        # With profile the time of every phase of the main loop is measured per frame and written to profile_output
+        # (CSV, or JSON for any other extension) on exit. With profile_overlay the phases are measured as well and their
+        # percentiles shown on screen.
+        self.profile = False
+        self.profile_overlay = False
+        self.profile_output = "profile.csv"
+
+        # With report_startup the time taken by each phase of the startup is printed once the first frame is shown.
+        self.report_startup = False
+
+        # With report_assets the request count, load count and load time of every asset are printed on exit.
+        self.report_assets = False
 
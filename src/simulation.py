@@ -0,0 +1,431 @@
+import pygame
+import random
+import math
+import time
+from objects import Lander, LandingPad, Obstacle
+from meteors import MeteorField
+from spatial import SpatialHash, swept_area, rect_at, time_of_impact
+from scheduler import EventScheduler, geometric_delay
+from layout import get_layout
+from terrain import get_terrain
+from profiler import frame_profiler
+
+
+# This class holds the complete game logic of a single mission (lander physics, hazards, landing detection and
+# control malfunctions) without depending on a display, fonts or frame pacing. It is advanced one tick at a time
+# with an explicit set of engaged controls, so that it can be driven either by the game play screen
+# or by offline jobs that replay missions as fast as possible. Given the same seed and the same controls for every
+# tick a mission always unfolds the same way, and the controls of every tick are logged for replays.
+class Simulation:
+    def __init__(self, settings, level, seed=None):
+
+        # All the randomness of the mission is drawn from its own generator, so that the mission can be reproduced
+        # from its seed. A seed is picked at random if none is given.
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # Initialise mission level and difficulty, with difficulty capping at the configured maximum level.
+        self.level = level
+        self.difficulty_level = level
+        if self.difficulty_level > settings.max_difficulty_level:
+            self.difficulty_level = settings.max_difficulty_level
+
+        # The odds (1 in N per sixtieth of a second) of a meteor storm and of a control failure, which shorten as
+        # difficulty increases, and the chances of each per tick.
+        self.storm_odds = max(1, settings.storm_odds - settings.storm_odds_per_level * self.difficulty_level)
+        self.failure_odds = max(2, settings.failure_odds - settings.failure_odds_per_level * self.difficulty_level)
+        self.storm_chance = 60 / (settings.simulation_hz * self.storm_odds)
+        self.failure_chance = 120 / (settings.simulation_hz * self.failure_odds)
+        self.tick_length = 1000 / settings.simulation_hz
+
+        # Create the lander.
+        self.lander = Lander(settings, self.rng)
+
+        # Pick the positions of the landing pads and obstacles from the precomputed layout of the screen resolution.
+        pads, obstacles = get_layout(settings).sample(self.rng)
+
+        # Create a sprite group and add 3 landing pads.
+        self.landing_sprites = pygame.sprite.Group()
+        for spawn_point, is_tall in pads:
+            self.landing_sprites.add(LandingPad(spawn_point, is_tall))
+
+        # Create a sprite group to hold the static obstacles, which are the hazards of the mission besides meteors.
+        self.obstacles = pygame.sprite.Group()
+
+        # Create and initialise the static obstacles for the mission.
+        self.create_obstacles(obstacles)
+
+        # The meteors of all the storms are held by the meteor field.
+        self.meteor_field = MeteorField(settings)
+
+        # Register the landing pads and obstacles with the collision grid. The obstacles currently touching the lander
+        # are kept in a set of their own.
+        self.collision_grid = SpatialHash()
+        for sprite in self.landing_sprites:
+            self.collision_grid.insert(sprite)
+        for sprite in self.obstacles:
+            self.collision_grid.insert(sprite)
+        self.touching_hazards = set()
+
+        # How far the lander moved during the last tick and the area it covered, for the swept collision tests.
+        # The displacement is None when collisions are only tested where the lander ended the tick.
+        self.displacement = None
+        self.swept_rect = self.lander.rect
+
+        # The solid terrain of the screen resolution cleared under the landing pads, None if the lander can only crash
+        # at the bottom of the screen.
+        self.terrain = None
+        if settings.terrain_collision:
+            self.terrain = get_terrain(settings).cleared([sprite.rect for sprite in self.landing_sprites])
+
+        # Flag that shows that a meteor storm is taking place.
+        self.storm_is_active = False
+        self.last_storm_end = 0
+
+        # The time (in seconds) the last storm took to place its meteors, reported by benchmark.py.
+        self.last_storm_placement_time = 0
+
+        # The time (in milliseconds) passed since the start of the mission and the number of ticks simulated.
+        self.time = 0
+        self.ticks = 0
+
+        # The controls engaged at every tick, see encode_controls().
+        self.input_log = bytearray()
+
+        # The events of the last tick worth showing (exhaust, impacts and crashes), as tuples of the event's name
+        # and its position plus any details. They are only recorded for the presentation, which may ignore them.
+        self.events = []
+
+        # This variable shows which of the controls is malfunctioning at the current moment.
+        self.failure = "None"
+
+        # The time when the last malfunction occurred.
+        self.failure_time = 0
+
+        # The meteor storms, control failures and repairs are events fired by the scheduler. Rather than rolling the
+        # odds at every tick, the time of the next storm and of the next failure are drawn when they become possible,
+        # with the same chance of happening at every tick. The next storm's event is kept to be replaced if need be.
+        self.scheduler = EventScheduler()
+        self.next_storm = None
+        self.schedule_storm()
+        self.schedule_failure()
+
+    # Advances the mission by a single tick. The given controls ("Left", "Right", "Thrust") are engaged in order,
+    # the same control may appear more than once.
+    def step(self, settings, controls=()):
+
+        # Log and engage the requested controls.
+        self.events = []
+        had_crashed = self.lander.has_crashed
+        self.input_log += encode_controls(controls)
+        for control in controls:
+            if control == "Left":
+                self.engage_left_control()
+            elif control == "Right":
+                self.engage_right_control()
+            elif control == "Thrust":
+                self.engage_thrust_control()
+
+        # Update the lander, noting how far it moved. The move is not swept when the lander wraps around a side.
+        start = self.lander.rect.topleft
+        self.lander.update(settings)
+        self.displacement = None
+        self.swept_rect = self.lander.rect
+        if settings.swept_collisions:
+            moved = (self.lander.rect.x - start[0], self.lander.rect.y - start[1])
+            if abs(moved[0]) < settings.screen_width / 2:
+                self.displacement = moved
+                self.swept_rect = swept_area(self.lander.rect, moved)
+        frame_profiler.mark("lander")
+
+        # Move the meteors, noting the time at which the last meteor storm ended and scheduling the next one.
+        if self.meteor_field.update(settings) and not self.meteor_field.storms:
+            self.last_storm_end = self.time
+            self.storm_is_active = False
+            self.schedule_storm()
+        frame_profiler.mark("hazards")
+
+        # Check for collisions between the lander and obstacles/meteors.
+        self.check_hits()
+        frame_profiler.mark("check_hits")
+
+        # Check for collision (landing or crash) between the lander and the landing pads.
+        self.check_landing()
+        self.check_terrain()
+        frame_profiler.mark("check_landing")
+
+        # Note the crash, whether on a landing pad, the terrain or the ground.
+        if self.lander.has_crashed and not had_crashed:
+            self.events.append(("crash",) + self.lander.rect.center)
+
+        # Advance the mission time and fire the storms, control malfunctions and repairs which are due.
+        self.time += self.tick_length
+        self.ticks += 1
+        self.update_events(settings)
+
+    # Returns True once the mission has ended with either a landing or a crash.
+    def is_over(self):
+        return self.lander.has_landed or self.lander.has_crashed
+
+    # Runs the mission headless until it is over or max_ticks have been simulated. The pilot is a function which
+    # receives the simulation before each tick and returns the controls to engage.
+    def run(self, settings, pilot, max_ticks=100000):
+        while not self.is_over() and self.ticks < max_ticks:
+            self.step(settings, pilot(self))
+        return self.lander.has_landed
+
+    # Fires the events which are due and sets all controls as malfunctioning once the lander has sustained 100% damage,
+    # once per tick.
+    def update_events(self, settings):
+        if self.lander.damage == 100:
+            self.failure = "Total"
+            self.lander.thruster.is_active = False
+        if self.scheduler.next_time <= self.time:
+            self.scheduler.run(self.time, settings)
+
+    # Schedules the next meteor storm, which becomes possible 2 seconds after the last one ended and then starts with
+    # a chance which increases as level difficulty increases.
+    def schedule_storm(self):
+        if self.next_storm is not None:
+            self.scheduler.cancel(self.next_storm)
+        delay = geometric_delay(self.rng, self.storm_chance, self.tick_length)
+        self.next_storm = self.scheduler.schedule(self.last_storm_end + 2000 + delay, self.start_storm)
+
+    # Creates the scheduled meteor storm, unless one is already taking place.
+    def start_storm(self, settings):
+        self.next_storm = None
+        if not self.storm_is_active:
+            self.create_meteor_storm(settings)
+
+    # Schedules the next control failure, with a chance which is dependant on the current mission difficulty level.
+    def schedule_failure(self):
+        delay = geometric_delay(self.rng, self.failure_chance, self.tick_length)
+        self.scheduler.schedule(self.time + delay, self.fail_control)
+
+    # Makes either turn control malfunction, unless all the controls already are, storing the moment at which it
+    # occurred and scheduling its repair 2 seconds later.
+    def fail_control(self, settings):
+        if self.failure == "None":
+            self.failure = self.rng.choice(("Left", "Right"))
+            self.failure_time = self.time
+            self.scheduler.schedule(self.time + 2000, self.repair_control)
+
+    # Fixes the malfunctioning control and schedules the next failure.
+    def repair_control(self, settings):
+        if self.failure != "Total":
+            self.failure = "None"
+            self.schedule_failure()
+
+    # Activates left turn control if functional
+    def engage_left_control(self):
+        if self.failure != "Left" and self.failure != "Total":
+            self.lander.turn("Left")
+
+    # Activates right turn control if functional
+    def engage_right_control(self):
+        if self.failure != "Right" and self.failure != "Total":
+            self.lander.turn("Right")
+
+    # Activates thruster control if functional
+    def engage_thrust_control(self):
+        if self.failure != "Thrust" and self.failure != "Total":
+            self.lander.accelerate()
+            if self.lander.thruster.is_active:
+                self.events.append(("exhaust", self.lander.rect.centerx, self.lander.rect.centery, self.lander.angle,
+                                    self.lander.velocity_x, self.lander.velocity_y, self.lander.image_or.get_height()))
+
+    # This function checks if the lander has made some kind of contact with any landing pad.
+    def check_landing(self):
+
+        # Check for collision with a landing pad along the lander's path, the first one touched deciding the outcome.
+        touched_landing_pad = []
+        for landing_pad in self.collision_grid.query(self.swept_rect, self.landing_sprites):
+            fraction = self.contact_time(landing_pad.rect, landing_pad.mask, self.displacement)
+            if fraction is not None:
+                touched_landing_pad.append((fraction, landing_pad))
+
+        # If a collision was detected, check whether the lander has landed safely or crashed. A lander which would
+        # have passed the landing pad by the end of the tick is put back where it touched it.
+        if touched_landing_pad:
+                fraction, landing_pad = min(touched_landing_pad, key=lambda contact: contact[0])
+                if fraction < 1:
+                    self.lander.rect = self.lander_rect_at(fraction)
+                    self.lander.thruster.update(self.lander.rect.midbottom, self.lander.angle)
+                if self.is_soft_landing(landing_pad):
+                    self.lander.has_landed = True
+                else:
+                    self.lander.damage = 100
+                    self.lander.has_crashed = True
+
+    # Crashes the lander if its opaque pixels have sunk into the terrain, unless it has just landed or crashed on a
+    # landing pad.
+    def check_terrain(self):
+        if self.terrain is None or self.is_over():
+            return
+        lander = self.lander
+        if lander.rect.bottom <= self.terrain.floor(lander.rect):
+            return
+        limit = self.terrain.top_limit(lander.rect, lander.rotations.profile(lander.angle))
+        if lander.rect.top > limit:
+            lander.rect.top = limit
+            lander.damage = 100
+            lander.has_crashed = True
+
+    # Returns the lander's rect at the given fraction of the last tick.
+    def lander_rect_at(self, fraction):
+        if fraction == 1:
+            return self.lander.rect
+        return rect_at(self.lander.rect, self.displacement, fraction)
+
+    # Returns the fraction of the last tick at which the lander first touched the given mask at the given rect, or None
+    # if it did not. The lander is tested where it ended the tick (fraction 1) and, if its displacement relative to
+    # the mask is given, all along its path during the tick.
+    def contact_time(self, rect, mask, displacement):
+        lander = self.lander
+        if lander.mask.overlap(mask, (rect.x - lander.rect.x, rect.y - lander.rect.y)):
+            return 1.0
+        if displacement is not None:
+            return time_of_impact(lander.rect, lander.mask, displacement, rect, mask)
+        return None
+
+    # Validates the landing as a soft landing otherwise indicates a crash. The lander has to touch down slower than 300
+    # pixels per second along both axes.
+    def is_soft_landing(self, landing_pad):
+        if (0 < self.lander.velocity_y < 300 and -300 < self.lander.velocity_x < 300 and -3 < self.lander.angle < 3 and
+                landing_pad.rect.collidepoint(self.lander.rect.bottomright) and
+                landing_pad.rect.collidepoint(self.lander.rect.bottomleft)):
+            return True
+        else:
+            return False
+
+    # When this function is called it generates a storm of meteors of varying numbers and sizes
+    # at a random starting position out of the screen and adds them to the mission's meteor field.
+    # The number of meteors is random unless given. The time taken to place the meteors is kept in seconds.
+    def create_meteor_storm(self, settings, meteor_count=None):
+        start = time.perf_counter()
+
+        self.storm_is_active = True
+
+        # Picks a random number of meteors between 5 and 10
+        if meteor_count is None:
+            meteor_count = self.rng.randint(5, 10)
+
+        # For the first meteor pick a random position among 400 pixels on the X axis,
+        # either to the right or the left of the screen with a 50% chance.
+        if self.rng.randint(1, 100) >= 51:
+            spawns_from = "Right"
+            eye_of_storm_x = settings.screen_width + self.rng.randint(-200, 200)
+        else:
+            spawns_from = "Left"
+            eye_of_storm_x = self.rng.randint(-200, 200)
+
+        # On the Y axis the first meteor has a fixed starting position at -200 pixels.
+        eye_of_storm_y = -200
+
+        # The meteors are spread over an occupancy grid centred at the eye of the storm. Each cell is as large as
+        # the largest meteor and holds a single one, so meteors can never overlap and no placement is ever retried.
+        # The grid reaches 2 cells (about 150 pixels) to either side of the eye and grows as needed for larger storms.
+        cell_size = int(self.meteor_field.sizes.max())
+        rings = max(2, math.ceil((math.sqrt(meteor_count) - 1) / 2))
+        cells = [(column, row) for column in range(-rings, rings + 1) for row in range(-rings, rings + 1)
+                 if (column, row) != (0, 0)]
+
+        # Place the first meteor at the centre cell.
+        kinds = [self.rng.randint(0, 3)]
+        centres = [(eye_of_storm_x, eye_of_storm_y)]
+
+        for column, row in self.rng.sample(cells, meteor_count - 1):
+
+            # Place the next meteor in a randomly picked free cell, deviating from the cell's centre
+            # as far as the meteor's size allows it to stay within the cell.
+            kind = self.rng.randint(0, 3)
+            width, height = self.meteor_field.size_of(kind)
+            slack_x = (cell_size - width) // 2
+            slack_y = (cell_size - height) // 2
+            kinds.append(kind)
+            centres.append((eye_of_storm_x + column * cell_size + self.rng.randint(-slack_x, slack_x),
+                            eye_of_storm_y + row * cell_size + self.rng.randint(-slack_y, slack_y)))
+
+        self.meteor_field.spawn_storm(self.time, centres, kinds, spawns_from)
+
+        self.last_storm_placement_time = time.perf_counter() - start
+
+    # This function is called during each mission's set up phase and is responsible for creating
+    # and initialising the static obstacles of the environment at the positions of the given layout.
+    def create_obstacles(self, obstacles):
+        for pos, image in obstacles:
+            self.obstacles.add(Obstacle(pos, image))
+
+    # This function checks for collisions between the lander and any obstacles or meteors.
+    def check_hits(self):
+
+        # Check if the lander's frame overlapped the frame of any obstacle near its path.
+        hazard_hit = []
+        for hazard in self.collision_grid.query(self.swept_rect, self.obstacles):
+            fraction = self.contact_time(hazard.rect, hazard.mask, self.displacement)
+            if fraction is not None:
+                hazard_hit.append(hazard)
+                if not hazard.is_touching:
+                    # Only damage the lander if this is the first frame at which the lander and the obstacle overlap.
+                    hazard.is_touching = True
+                    self.touching_hazards.add(hazard)
+                    self.lander.damage += hazard.damage_caused
+                    self.events.append(("impact",) + self.lander_rect_at(fraction).clip(hazard.rect).center)
+
+        # Clear the "first impact" flag for all obstacles that are no longer overlapping the lander.
+        for x in self.touching_hazards - set(hazard_hit):
+            x.is_touching = False
+            self.touching_hazards.discard(x)
+
+        # Do the same for the meteors, whose flags are kept by the meteor field. As the meteors move too, the lander's
+        # path is followed relative to each meteor.
+        field = self.meteor_field
+        if field.count:
+            if self.displacement is None:
+                meteor_hit = [(x, 1.0) for x in field.hits(self.lander)]
+            else:
+                meteor_hit = []
+                for x in field.swept(self.lander.rect, self.displacement).tolist():
+                    velocity = field.velocity(x)
+                    fraction = self.contact_time(field.rect(x), field.masks[field.kind[x]],
+                                                 (self.displacement[0] - velocity[0],
+                                                  self.displacement[1] - velocity[1]))
+                    if fraction is not None:
+                        meteor_hit.append((x, fraction))
+            for x, fraction in meteor_hit:
+                if not field.touching[x]:
+                    self.lander.damage += field.damage_caused
+                    meteor_rect = rect_at(field.rect(x), field.velocity(x), fraction)
+                    self.events.append(("impact",) + self.lander_rect_at(fraction).clip(meteor_rect).center)
+            meteor_hit = [x for x, fraction in meteor_hit]
+            field.touching[:field.count] = False
+            field.touching[meteor_hit] = True
+
+        # Damage cannot exceed 100%.
+        if self.lander.damage >= 100:
+            self.lander.damage = 100
+
+
+# The codes of the controls in the input log.
+control_codes = {"Left": 1, "Right": 2, "Thrust": 3}
+code_controls = {code: control for control, code in control_codes.items()}
+
+
+# Encodes the controls of a single tick as one byte per control followed by a zero byte.
+def encode_controls(controls):
+    return bytes([control_codes[control] for control in controls] + [0])
+
+
+# Decodes an input log into the list of controls engaged at every tick.
+def decode_controls(input_log):
+    ticks = []
+    controls = []
+    for code in input_log:
+        if code:
+            controls.append(code_controls[code])
+        else:
+            ticks.append(controls)
+            controls = []
+    return ticks
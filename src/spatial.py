@@ -0,0 +1,88 @@
+import math
+
+
+# This class is a uniform grid broad phase for sprite collisions. Every registered sprite is filed under the grid
+# cells its rect overlaps, so that looking up the sprites near a rect only visits the few cells that rect covers
+# instead of every sprite of the mission. The candidates are culled by their bounding boxes before they are returned,
+# which leaves only the pairs that need an exact mask test.
+class SpatialHash:
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+
+        # Maps each cell (column, row) to the set of sprites overlapping it.
+        self.cells = {}
+
+        # Maps each registered sprite to its registration order.
+        self.order = {}
+        self.next_order = 0
+
+    # Returns the list of cells overlapped by the given rect.
+    def cells_of(self, rect):
+        size = self.cell_size
+        return [(column, row)
+                for column in range(rect.left // size, (rect.right - 1) // size + 1)
+                for row in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    # Registers a sprite at the current position of its rect.
+    def insert(self, sprite):
+        for key in self.cells_of(sprite.rect):
+            self.cells.setdefault(key, set()).add(sprite)
+        self.order[sprite] = self.next_order
+        self.next_order += 1
+
+    # Returns the registered sprites whose rects overlap the given rect, in registration order. When a group is given
+    # only its members are returned.
+    def query(self, rect, group=None):
+        found = set()
+        for key in self.cells_of(rect):
+            cell = self.cells.get(key)
+            if cell:
+                found |= cell
+        near = [sprite for sprite in found if rect.colliderect(sprite.rect) and (group is None or group.has(sprite))]
+        near.sort(key=self.order.get)
+        return near
+
+
+# Returns the area covered by a rect during a tick in which it moved by the given displacement to its current position.
+def swept_area(rect, displacement):
+    return rect.union(rect.move(-displacement[0], -displacement[1]))
+
+
+# Returns where a rect was at the given fraction of a tick in which it moved by the given displacement to its current
+# position, rounding to whole pixels like the sprites' moves do.
+def rect_at(rect, displacement, fraction):
+    return rect.move(-round(displacement[0] * (1 - fraction)), -round(displacement[1] * (1 - fraction)))
+
+
+# Returns the earliest fraction of a tick at which a mask, which moved by the given displacement to end the tick at
+# the given rect, overlapped another mask resting at the other rect, or None if they never overlapped. When the other
+# mask moved as well, the displacement relative to it is given instead. The interval during which the bounding boxes
+# overlap is found first (the slab method), then the masks are tested at every pixel of the path within it, so even
+# displacements larger than both sprites cannot pass through unnoticed.
+def time_of_impact(rect, mask, displacement, other_rect, other_mask):
+    entry, exit = 0.0, 1.0
+    axes = ((rect.left, rect.right, other_rect.left, other_rect.right, displacement[0]),
+            (rect.top, rect.bottom, other_rect.top, other_rect.bottom, displacement[1]))
+    for low, high, other_low, other_high, moved in axes:
+
+        # At fraction t the rect spans low - moved * (1 - t) to high - moved * (1 - t) along this axis.
+        start_low = low - moved
+        start_high = high - moved
+        if moved == 0:
+            if start_low >= other_high or other_low >= start_high:
+                return None
+        else:
+            first = (other_low - start_high) / moved
+            last = (other_high - start_low) / moved
+            entry = max(entry, min(first, last))
+            exit = min(exit, max(first, last))
+            if entry >= exit:
+                return None
+
+    steps = max(1, math.ceil(max(abs(displacement[0]), abs(displacement[1])) * (exit - entry)))
+    for step in range(steps + 1):
+        fraction = entry + (exit - entry) * step / steps
+        position = rect_at(rect, displacement, fraction)
+        if mask.overlap(other_mask, (other_rect.x - position.x, other_rect.y - position.y)):
+            return fraction
+    return None
@@ -0,0 +1,165 @@
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import time
+import json
+from settings import Settings
+from simulation import Simulation
+
+
+# Returns a pilot which engages random controls: the thruster on about a third of the ticks and each turn control
+# on a tenth of them.
+def random_pilot(seed):
+    rng = random.Random(seed)
+
+    def pilot(simulation):
+        controls = []
+        if rng.random() < 0.33:
+            controls.append("Thrust")
+        roll = rng.random()
+        if roll < 0.1:
+            controls.append("Left")
+        elif roll < 0.2:
+            controls.append("Right")
+        return controls
+    return pilot
+
+
+# Returns a pilot which flies towards the nearest landing pad. It tilts the lander to reach a horizontal speed
+# proportional to the distance from the pad, keeps the falling speed proportional to the height above the pad
+# and straightens the lander up for the touchdown.
+def scripted_pilot(seed):
+
+    def pilot(simulation):
+        lander = simulation.lander
+        pad = min(simulation.landing_sprites, key=lambda pad: abs(pad.rect.centerx - lander.rect.centerx))
+        distance = pad.rect.centerx - lander.rect.centerx
+        height = pad.rect.top - lander.rect.bottom
+
+        # Pick the angle which accelerates the lander towards the wanted horizontal speed, upright near the pad.
+        wanted_velocity_x = max(-180, min(180, distance * 1.5))
+        if height < 80 or abs(distance) < 10:
+            wanted_angle = 0
+        else:
+            wanted_angle = max(-20, min(20, round((lander.velocity_x - wanted_velocity_x) / 6)))
+
+        controls = []
+        if lander.angle < wanted_angle:
+            controls.append("Left")
+        elif lander.angle > wanted_angle:
+            controls.append("Right")
+
+        # Brake whenever the lander falls faster than wanted, which is slow above the pad and faster further up.
+        wanted_velocity_y = max(90, min(240, height * 1.2)) if abs(distance) < 40 else 60
+        if lander.velocity_y > wanted_velocity_y or (height < 60 and abs(distance) > 40):
+            controls.append("Thrust")
+        return controls
+    return pilot
+
+
+pilots = {"random": random_pilot, "scripted": scripted_pilot}
+
+
+# The settings of the worker processes, set once per process by init_worker().
+worker_settings = None
+
+
+def init_worker(settings):
+    global worker_settings
+    worker_settings = settings
+
+
+# Runs a single mission headless and returns its level, whether it landed or crashed, its damage, the fuel used
+# and the mission time in seconds.
+def run_mission(task):
+    level, seed, pilot_name, max_ticks = task
+    simulation = Simulation(worker_settings, level, seed)
+    simulation.run(worker_settings, pilots[pilot_name](seed), max_ticks)
+    return (level, simulation.lander.has_landed, simulation.lander.has_crashed, simulation.lander.damage,
+            1000 - simulation.lander.fuel, simulation.time / 1000)
+
+
+# Returns the value at the given fraction of a sorted list.
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+# Aggregates the results of the missions of a single level.
+def summarise(results):
+    damages = sorted(damage for level, landed, crashed, damage, fuel, seconds in results)
+    landing_times = [seconds for level, landed, crashed, damage, fuel, seconds in results if landed]
+    return {"missions": len(results),
+            "landed": sum(landed for level, landed, crashed, damage, fuel, seconds in results) / len(results),
+            "crashed": sum(crashed for level, landed, crashed, damage, fuel, seconds in results) / len(results),
+            "damage_mean": statistics.mean(damages),
+            "damage_p50": percentile(damages, 0.5),
+            "damage_p90": percentile(damages, 0.9),
+            "damage_histogram": [sum(low <= damage < low + 25 for damage in damages) for low in (0, 25, 50, 75)] +
+                                [damages.count(100)],
+            "fuel_mean": statistics.mean(fuel for level, landed, crashed, damage, fuel, seconds in results),
+            "time_to_land_mean": statistics.mean(landing_times) if landing_times else None,
+            "time_to_land_p50": percentile(sorted(landing_times), 0.5) if landing_times else None}
+
+
+# Sets Settings attributes from "name=value" strings, keeping the type of the current value.
+def apply_overrides(settings, overrides):
+    for override in overrides:
+        name, value = override.split("=", 1)
+        if name not in vars(settings):
+            raise SystemExit("unknown setting: %s" % name)
+        if isinstance(getattr(settings, name), bool):
+            setattr(settings, name, value.lower() in ("1", "true", "yes", "on"))
+        else:
+            setattr(settings, name, type(getattr(settings, name))(value))
+
+
+# Runs many seeded missions per level with the chosen pilot over a pool of processes and prints the crash rate,
+# damage distribution, fuel usage and time to land of every level.
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the mission difficulty with simulated pilots.")
+    parser.add_argument("--levels", default="1-12", help="level or range of levels to sweep (default 1-12)")
+    parser.add_argument("--missions", type=int, default=200, help="number of missions per level")
+    parser.add_argument("--pilot", choices=sorted(pilots), default="scripted", help="pilot flying the missions")
+    parser.add_argument("--seed", type=int, default=1, help="seed picking the mission seeds")
+    parser.add_argument("--max-ticks", type=int, default=7200, help="ticks after which a mission is abandoned")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a setting, e.g. --set storm_odds=300 (repeatable)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    first_level, last_level = (int(level) for level in (args.levels.split("-") + [args.levels])[:2])
+    settings = Settings()
+    settings.screen_width, settings.screen_height = 1200, 750
+    apply_overrides(settings, args.set)
+
+    rng = random.Random(args.seed)
+    tasks = [(level, rng.getrandbits(32), args.pilot, args.max_ticks)
+             for level in range(first_level, last_level + 1) for x in range(args.missions)]
+
+    start = time.perf_counter()
+    results = {}
+    with multiprocessing.Pool(args.processes, init_worker, (settings,)) as pool:
+        for result in pool.imap_unordered(run_mission, tasks, chunksize=max(1, len(tasks) // (args.processes * 8))):
+            results.setdefault(result[0], []).append(result)
+    elapsed = time.perf_counter() - start
+
+    summaries = {level: summarise(results[level]) for level in sorted(results)}
+    print("level  landed crashed  damage mean/p50/p90  histogram 0-24/-49/-74/-99/100   fuel  time to land")
+    for level, summary in summaries.items():
+        landing = ("%6.1f s" % summary["time_to_land_mean"]) if summary["time_to_land_mean"] is not None else "     -"
+        print("{0:5d} {1:7.1%} {2:7.1%}  {3:6.1f} {4:4d} {5:4d}      {6:32s} {7:6.0f}  {8}".format(
+            level, summary["landed"], summary["crashed"], summary["damage_mean"], summary["damage_p50"],
+            summary["damage_p90"], " ".join("%5d" % count for count in summary["damage_histogram"]),
+            summary["fuel_mean"], landing))
+    print("{0:d} missions in {1:.1f} s on {2:d} processes".format(len(tasks), elapsed, args.processes))
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"settings": vars(settings), "pilot": args.pilot, "levels": summaries}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import pygame
+import os
+import io
+import copy
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from assets import asset_registry, resources_path, cache_path, surface_lock, write_atomically
+
+
+# This class holds the solid terrain of the Mars background as a height per screen column: the row of the topmost
+# solid pixel of the column, or the screen height where the column is all sky. The terrain mask is read from the
+# background scaled to the screen, where the sky brightens steadily downwards and the silhouette of the ridges is
+# the first pixel much darker than the sky above it. The landing pads stand in front of the ridges, so every mission
+# uses a copy of the terrain lowered to the bottom of its own landing pads, see cleared().
+#
+# For every lander width the highest terrain under each window of that many columns is computed once, so whether
+# a rect is clear of the terrain is a single table lookup whatever its size or position. Only a rect below that
+# floor is tested with the bottom of its sprite's opaque pixels in every column, so that the transparent corners of
+# a rotated lander never touch the ground.
+class Terrain:
+
+    # The drop in brightness below the brightest pixel above it, in the same column, from which a pixel is solid.
+    silhouette_threshold = 25
+
+    def __init__(self, settings):
+        self.width = settings.screen_width
+        self.height = settings.screen_height
+
+        # The silhouette is also kept in the cache folder, as it takes a scan of the whole background.
+        cache_file = os.path.join(cache_path, "terrain", "mars_background_%dx%d.npy" % (self.width, self.height))
+        self.heights = self.load_silhouette(cache_file, os.path.join(resources_path, "mars_background.png"))
+        if self.heights is None:
+            self.heights = self.find_silhouette()
+            self.save_silhouette(cache_file)
+
+        # The window minima of every width used so far, see window_minima().
+        self.minima = {}
+
+    # Returns a copy of the terrain lowered to the bottom of the given landing pad rects, leaving a clearing from which
+    # to approach each of them.
+    def cleared(self, rects):
+        terrain = copy.copy(self)
+        terrain.heights = self.heights.copy()
+        for rect in rects:
+            columns = slice(max(rect.left, 0), min(rect.right, self.width))
+            terrain.heights[columns] = np.maximum(terrain.heights[columns], rect.bottom)
+        terrain.minima = {}
+        return terrain
+
+    # Returns the height of every column of the scaled background's terrain mask.
+    def find_silhouette(self):
+        background = asset_registry.scaled((self.width, self.height), "mars_background.png")
+        with surface_lock:
+            pixels = pygame.surfarray.array3d(background)
+        luminance = pixels.astype(np.int32) @ np.array([299, 587, 114]) // 1000
+        solid = luminance < np.maximum.accumulate(luminance, axis=1) - self.silhouette_threshold
+        return np.where(solid.any(axis=1), solid.argmax(axis=1), self.height).astype(np.int32)
+
+    # Reads the column heights written by save_silhouette(). Returns None if there is no such file, if it is
+    # older than the background image or if it does not hold a height for every column.
+    def load_silhouette(self, cache_file, source):
+        if not os.path.isfile(cache_file) or os.path.getmtime(cache_file) < os.path.getmtime(source):
+            return None
+        try:
+            heights = np.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if heights.shape != (self.width,):
+            return None
+        return heights.astype(np.int32)
+
+    # Writes the column heights to the given file, replacing it atomically and leaving it out if the cache folder
+    # is not writable.
+    def save_silhouette(self, cache_file):
+        heights = io.BytesIO()
+        np.save(heights, self.heights)
+        try:
+            write_atomically(cache_file, heights.getvalue())
+        except OSError:
+            pass
+
+    # Returns the height of the highest terrain under every window of the given width, indexed on the window's
+    # left column plus margin for left columns from -margin to the screen width. Columns off the screen have
+    # no terrain. The margin must be at least the width.
+    def window_minima(self, width, margin):
+        padded = np.concatenate((np.full(margin, self.height, dtype=np.int32), self.heights,
+                                 np.full(width, self.height, dtype=np.int32)))
+        return sliding_window_view(padded, width).min(axis=1)
+
+    # Returns the height of the highest terrain under the columns spanned by the given rect.
+    def floor(self, rect):
+        width = rect.width
+        if width not in self.minima:
+            self.minima[width] = self.window_minima(width, width)
+        return int(self.minima[width][min(max(rect.left, -width), self.width) + width])
+
+    # Returns the lowest top a sprite with the given bottom profile can have without sinking into the terrain, for
+    # every left column of its rect from -margin to the screen width, indexed on the left column plus margin. The
+    # profile holds the bottom of the opaque pixels of every column of the sprite, measured from the top of its rect,
+    # and 0 for the columns without any. Columns off the screen have no terrain. The margin must be at least the
+    # length of the profile.
+    def top_limits(self, profile, margin):
+        padded = np.concatenate((np.full(margin, self.height, dtype=np.int32), self.heights,
+                                 np.full(len(profile), self.height, dtype=np.int32)))
+        return np.where(profile > 0, sliding_window_view(padded, len(profile)) - profile, self.height).min(axis=1)
+
+    # Returns the lowest top a sprite with the given bottom profile, see top_limits(), can have at the given rect
+    # without sinking into the terrain.
+    def top_limit(self, rect, profile):
+        left = max(rect.left, 0)
+        right = min(rect.left + len(profile), self.width)
+        bottoms = profile[left - rect.left:right - rect.left]
+        limits = np.where(bottoms > 0, self.heights[left:right] - bottoms, self.height)
+        return int(limits.min(initial=self.height))
+
+
+# Terrains already computed, keyed on the screen resolution.
+terrains = {}
+
+
+# Returns the terrain for the screen resolution of the given settings, computing it on first use.
+def get_terrain(settings):
+    resolution = (settings.screen_width, settings.screen_height)
+    if resolution not in terrains:
+        terrains[resolution] = Terrain(settings)
+    return terrains[resolution]
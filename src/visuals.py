@@ -1,3 +1,61 @@
+import pygame
+import threading
+from collections import OrderedDict
+
+
+# This class caches rendered text surfaces keyed on (font, text, color) so that instrument readings and menu entries
+# are rasterised only when their value actually changes. The least recently used surfaces are evicted once the cache
+# holds more than the given number of them. Color variations of an already rendered text, like the "breathing"
+# effect, are produced by modulating the color of a white rendering instead of rasterising the font again.
+# Its lock serialises the lookups, since MissionPrefetcher builds missions and renders their texts off the main thread.
+class TextCache:
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    # Returns the surface of the given text rendered (anti-aliased) with the given font and color.
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        with self.lock:
+            surface = self.lookup(key)
+            if surface is None:
+                surface = self.store(key, font.render(text, True, color))
+        return surface
+
+    # Returns a copy of the given surface with its color channels multiplied by the given color, which turns
+    # a white text into a text of that color.
+    def modulate(self, surface, color):
+        key = (surface, tuple(color))
+        with self.lock:
+            tinted = self.lookup(key)
+            if tinted is None:
+                tinted = surface.copy()
+                tinted.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+                self.store(key, tinted)
+        return tinted
+
+    # Returns the cached surface for the given key, marking it as the most recently used, or None.
+    def lookup(self, key):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+        return surface
+
+    # Adds a surface to the cache, evicting the least recently used one when the capacity is exceeded.
+    def store(self, key, surface):
+        self.misses += 1
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+# The text cache shared by the whole game.
+text_cache = TextCache()
 
 
 # This class implements the "breathing" visual effect used to highlight